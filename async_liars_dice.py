@@ -0,0 +1,129 @@
+import asyncio
+import copy
+import time
+from typing import Dict, List
+
+from utils.color_printer import *
+from game.round import Round
+from game.seating import Seating
+from liars_dice import LiarDiceGame
+from player.player import Player
+from player.player_stats import PlayerStats
+from player.strategy.async_strategy import as_async_strategy
+from player.strategy.slow_strategy import SlowStrategy
+from player.strategy.strategy import Strategy
+from tournament import Tournament
+
+
+class AsyncRound(Round):
+  """
+  A round whose strategies are awaited. Same rules as `Round.play`, so with regular strategies
+  (and the same random numbers) it plays out exactly the same way.
+  """
+  async def play(self):
+    if not self.start_round():
+      return None
+
+    for p in self.players:
+      self.record_roll(p)
+      await p.strategy.prepare_for_new_round(self.dice_counts, p.dice)
+    self.show_dice()
+
+    while True:
+      # get the next bid
+      bid = await self.active_player.strategy.make_bid(*self.make_bid_args())
+      result = self.take_bid(bid)
+      if result is not None:
+        return result
+
+      # otherwise, check to see if any players will challenge it
+      for player_to_call, out_of_turn, probability, args in self.challengers():
+        if await player_to_call.strategy.challenge_bid(*args):
+          return self.resolve_call(self.active_player, player_to_call, out_of_turn, probability)
+
+      # no one challenged it, move on to the next player
+      self.active_player_index = self.next_player_index(self.active_player_index)
+
+
+class AsyncLiarDiceGame(LiarDiceGame):
+  """
+  A game of Liar's Dice played on an asyncio event loop, so many games can wait on their strategies at once.
+  Players can have an `AsyncStrategy` or a regular `Strategy`, which is adapted automatically.
+  Decision timers aren't supported: time spent waiting on other games would count against each decision.
+  """
+  def __init__(self, players: List[Player], verbose=False, rng=None, recorder=None, reuse_players=False):
+    super().__init__(players, verbose, rng, recorder, reuse_players=reuse_players)
+
+  def shuffle_players(self):
+    shuffled_list = super().shuffle_players()
+    for player in shuffled_list:
+      player.strategy = as_async_strategy(player.strategy)
+    return shuffled_list
+
+  def new_round(self, starting_seat, seating):
+    self.round_number += 1
+    if self.verbose:
+      print(f"\n\n----- {ColorPrinter.BLUE_TEXT}Round {self.round_number}{ColorPrinter.RESET_TEXT} -----")
+    return AsyncRound(seating.in_turn_order(starting_seat), self.verbose, self.rng, self.recorder)
+
+  async def play_game(self):
+    starting_seat = 0
+    seating = Seating(self.start_game())
+    standings = []
+    while len(seating) > 1:
+      current_round = self.new_round(starting_seat, seating)
+      round_winner, round_loser = await current_round.play()
+      self.bids_per_round.append(len(current_round.history))
+      starting_seat = self.end_round(seating, standings, round_winner, round_loser)
+    return self.end_game(seating, standings)
+
+
+async def play_games(players: List[Player], num_games: int, seed=None, max_concurrent_games=1000) -> Dict[str, PlayerStats]:
+  """
+  Plays `num_games` games, up to `max_concurrent_games` at a time, and returns the stats of each player keyed by name.
+  Games are seeded the same way as `Tournament`'s, and their stats are added up in game order,
+  so a seeded run with regular strategies gives the same stats as `Tournament`.
+  """
+  results = {p.name: PlayerStats(p.stats.keep_samples) for p in players}
+  games = iter(range(0, num_games))
+  finished = {}  # game index -> each player's stats from it, until every game before it has finished too
+  next_to_merge = 0
+
+  async def play():
+    nonlocal next_to_merge
+    # games played at once can't share players, but each of these plays its games one after another
+    # with the same copies, reset for every game
+    game_players = copy.deepcopy(players)
+    for game_index in games:
+      game = AsyncLiarDiceGame(game_players, rng=Tournament.game_rng(seed, game_index), reuse_players=True)
+      standings = await game.play_game()
+      # taken off the players before their next game resets them
+      finished[game_index] = [(s.name, s.stats) for s in standings]
+      for s in standings:
+        s.stats = PlayerStats(s.stats.keep_samples)
+      while next_to_merge in finished:
+        for name, stats in finished.pop(next_to_merge):
+          results[name].update(stats)
+        next_to_merge += 1
+
+  await asyncio.gather(*(play() for _ in range(0, min(max_concurrent_games, num_games))))
+  return results
+
+
+if __name__ == "__main__":
+  players = [
+    Player("Alice", Strategy),
+    Player("Bob", Strategy),
+    Player("Charlie", Strategy),
+    Player("Diana", Strategy),
+    Player("Slow", SlowStrategy)
+  ]
+  # Every decision of the slow player waits a few milliseconds. Played one at a time those waits add up,
+  # played at once they overlap.
+  for num_games, max_concurrent_games in [(20, 1), (2000, 1000)]:
+    start = time.perf_counter()
+    stats = asyncio.run(play_games(players, num_games, seed=0, max_concurrent_games=max_concurrent_games))
+    elapsed = time.perf_counter() - start
+    print(f"{num_games} games, {max_concurrent_games} at a time: {num_games / elapsed:.1f} games/sec")
+  ColorPrinter.cprint(Color.BLUE, "Slow")
+  print(stats["Slow"])
@@ -0,0 +1,268 @@
+from typing import Dict, List
+
+import numpy as np
+
+from game.probability import tail_table
+from player.player import Player
+from player.player_stats import PlayerStats
+from player.strategy.strategy import Strategy
+
+
+class BatchLiarDiceGame:
+  """
+  Plays many games of Liar's Dice in lockstep, with the state of every game kept in NumPy arrays.
+  Each step, every unfinished game has its active seat make a bid, which is then either
+  challenged or passed on, the same way `Round.play` handles it.
+
+  Only the built-in threshold `Strategy` can be batched: its bids are fixed and it calls
+  whenever the probability of the bid is below `CALL_PROBABILITY_THRESHOLD`.
+  Subclasses that only change that threshold are fine, which is handy for parameter sweeps.
+  """
+  def __init__(self, players: List[Player], num_games: int, seed=None):
+    for player in players:
+      if not BatchLiarDiceGame.can_batch(player.strategy):
+        raise ValueError(f"{player.name}'s strategy ({type(player.strategy).__name__}) can't be played in a batch")
+
+    self.players = players
+    self.num_games = num_games
+    self.rng = np.random.default_rng(seed)
+
+    num_players = len(players)
+    self.max_dice = max(p.num_dice for p in players)
+    self.thresholds = np.array([p.strategy.CALL_PROBABILITY_THRESHOLD for p in players])
+
+    # probabilities[u, k]: probability at least k of u unknown dice match a bid
+    max_unknown = sum(p.num_dice for p in players)
+    self.probabilities = np.zeros((max_unknown + 1, max_unknown + 2))
+    for unknown in range(0, max_unknown + 1):
+      self.probabilities[unknown, :unknown + 1] = tail_table(unknown)
+
+    # Per-player stat totals, indexed by player
+    self.bids = np.zeros(num_players, dtype=np.int64)
+    self.bids_called = np.zeros(num_players, dtype=np.int64)
+    self.successful_bids = np.zeros(num_players, dtype=np.int64)
+    self.successful_calls = np.zeros(num_players, dtype=np.int64)
+    self.calls_out_of_turn = np.zeros(num_players, dtype=np.int64)
+    self.forced_calls = np.zeros(num_players, dtype=np.int64)
+    self.call_players = []
+    self.call_probabilities = []
+
+  @staticmethod
+  def can_batch(strategy) -> bool:
+    return (
+      isinstance(strategy, Strategy)
+      and type(strategy).make_bid is Strategy.make_bid
+      and type(strategy).challenge_bid is Strategy.challenge_bid
+    )
+
+  def shuffle_seats(self):
+    """
+    seat_player[g, s] is the index of the player sitting in seat s of game g.
+    """
+    seats = np.tile(np.arange(len(self.players)), (self.num_games, 1))
+    return self.rng.permuted(seats, axis=1)
+
+  def roll_dice(self, games):
+    """
+    Rolls the dice of every seat in `games`, and counts the dice matching each face (including wilds).
+    """
+    dice = self.rng.integers(1, 7, size=(len(games), len(self.players), self.max_dice), dtype=np.int8)
+    in_play = np.arange(self.max_dice) < self.num_dice[games][:, :, None]
+    dice = np.where(in_play, dice, 0)
+    face_counts = (dice[..., None] == np.arange(7)).sum(axis=2)
+    matching = face_counts + face_counts[..., 1:2]
+    self.matching[games] = matching
+    self.total_matching[games] = matching.sum(axis=1)
+
+  def next_seat(self, games, seats):
+    """
+    The next seat still in the game after `seats`, in turn order.
+    """
+    offsets = (np.arange(len(self.players)) - seats[:, None]) % len(self.players)
+    offsets = np.where((self.num_dice[games] > 0) & (offsets > 0), offsets, len(self.players))
+    return (seats + offsets.min(axis=1)) % len(self.players)
+
+  def compute_probability(self, games, seats, number_of_dice, face_value):
+    """
+    Same as `Round.compute_probability`, for each seat in `seats` and the given bids.
+    `seats` can either have one seat per game, or a seat for every seat at the table.
+    """
+    if seats.ndim == 1:
+      known = self.matching[games, seats, face_value]
+      unknown = self.total_dice[games] - self.num_dice[games, seats]
+    else:
+      known = self.matching[games[:, None], seats, face_value[:, None]]
+      unknown = self.total_dice[games][:, None] - self.num_dice[games[:, None], seats]
+      number_of_dice = number_of_dice[:, None]
+    needed = np.clip(number_of_dice - known, 0, self.probabilities.shape[1] - 1)
+    return self.probabilities[unknown, needed]
+
+  def resolve_call(self, games, bidders, challengers, out_of_turn, probability):
+    """
+    Same as `Round.resolve_call`. Returns the winning and losing seats.
+    """
+    bidder_players = self.seat_player[games, bidders]
+    challenger_players = self.seat_player[games, challengers]
+    np.add.at(self.bids_called, bidder_players, 1)
+    np.add.at(self.calls_out_of_turn, challenger_players, out_of_turn)
+    self.call_players.append(challenger_players)
+    self.call_probabilities.append(probability)
+
+    bid_holds = self.total_matching[games, self.bid_face[games]] >= self.bid_count[games]
+    np.add.at(self.successful_bids, bidder_players, bid_holds)
+    np.add.at(self.successful_calls, challenger_players, ~bid_holds)
+    winners = np.where(bid_holds, bidders, challengers)
+    losers = np.where(bid_holds, challengers, bidders)
+    return winners, losers
+
+  def end_round(self, games, winners, losers):
+    self.num_dice[games, losers] -= 1
+    self.total_dice[games] -= 1
+
+    eliminated = self.num_dice[games, losers] == 0
+    self.alive[games[eliminated]] -= 1
+    self.placement[games[eliminated], losers[eliminated]] = self.alive[games[eliminated]]
+
+    over = self.alive[games] == 1
+    self.placement[games[over], winners[over]] = 0
+    self.playing[games[over]] = False
+
+    # the next round starts with whoever won the last round
+    games, winners = games[~over], winners[~over]
+    self.active[games] = winners
+    self.bid_count[games] = 0
+    self.bid_face[games] = 0
+    self.new_round[games] = True
+
+  def step(self):
+    """
+    Has the active seat of every unfinished game make a bid, and gives everyone else a chance to call it.
+    """
+    games = np.flatnonzero(self.playing)
+    starting = games[self.new_round[games]]
+    if len(starting) > 0:
+      self.roll_dice(starting)
+      self.new_round[starting] = False
+
+    active = self.active[games]
+    count = self.bid_count[games]
+    face = self.bid_face[games]
+    first_bid = face == 0
+
+    # Strategy.make_bid
+    new_face = np.where(first_bid, 2, np.minimum(face + 1, 6))
+    new_count = np.where(first_bid, 1, np.where(face < 6, count, count + 1))
+    valid = new_count <= self.total_dice[games]
+
+    # an invalid first bid loses a die outright
+    lost = first_bid & ~valid
+    if lost.any():
+      self.end_round(games[lost], self.next_seat(games[lost], active[lost]), active[lost])
+
+    # an invalid bid after that forces a call on the last bid
+    forced = ~first_bid & ~valid
+    if forced.any():
+      g, challengers = games[forced], active[forced]
+      np.add.at(self.forced_calls, self.seat_player[g, challengers], 1)
+      probability = self.compute_probability(g, challengers, count[forced], face[forced])
+      winners, losers = self.resolve_call(g, self.bidder[g], challengers, np.zeros(len(g), dtype=bool), probability)
+      self.end_round(g, winners, losers)
+
+    if not valid.any():
+      return
+    games, active = games[valid], active[valid]
+    count, face = new_count[valid], new_face[valid]
+    self.bid_count[games] = count
+    self.bid_face[games] = face
+    self.bidder[games] = active
+    np.add.at(self.bids, self.seat_player[games, active], 1)
+
+    # Strategy.challenge_bid, for each seat in turn order after the bidder
+    num_players = len(self.players)
+    seats = np.broadcast_to(np.arange(num_players), (len(games), num_players))
+    probability = self.compute_probability(games, seats, count, face)
+    offsets = (seats - active[:, None]) % num_players
+    in_line = (self.num_dice[games] > 0) & (offsets > 0)
+    calls = in_line & (probability < self.thresholds[self.seat_player[games]])
+    first_in_line = np.where(in_line, offsets, num_players).min(axis=1)
+    first_call = np.where(calls, offsets, num_players).min(axis=1)
+
+    called = first_call < num_players
+    if called.any():
+      g = games[called]
+      challengers = (active[called] + first_call[called]) % num_players
+      out_of_turn = first_call[called] > first_in_line[called]
+      winners, losers = self.resolve_call(g, active[called], challengers, out_of_turn, probability[called, challengers])
+      self.end_round(g, winners, losers)
+
+    # no one challenged it, move on to the next player
+    passed = ~called
+    self.active[games[passed]] = (active[passed] + first_in_line[passed]) % num_players
+
+  def play_games(self) -> Dict[str, PlayerStats]:
+    """
+    Plays all the games, and returns the stats of each player keyed by name.
+    """
+    num_players = len(self.players)
+    self.seat_player = self.shuffle_seats()
+    starting_dice = np.array([p.num_dice for p in self.players])
+    self.num_dice = starting_dice[self.seat_player]
+    self.total_dice = self.num_dice.sum(axis=1)
+    self.alive = (self.num_dice > 0).sum(axis=1)
+    self.matching = np.zeros((self.num_games, num_players, 7), dtype=np.int64)
+    self.total_matching = np.zeros((self.num_games, 7), dtype=np.int64)
+    self.active = np.zeros(self.num_games, dtype=np.int64)
+    self.bidder = np.zeros(self.num_games, dtype=np.int64)
+    self.bid_count = np.zeros(self.num_games, dtype=np.int64)
+    self.bid_face = np.zeros(self.num_games, dtype=np.int64)
+    self.placement = np.zeros((self.num_games, num_players), dtype=np.int64)
+    self.playing = self.alive > 1
+    self.new_round = np.ones(self.num_games, dtype=bool)
+
+    while self.playing.any():
+      self.step()
+
+    return self.collect_stats()
+
+  def collect_stats(self) -> Dict[str, PlayerStats]:
+    games = np.arange(self.num_games)[:, None]
+    performance = np.empty_like(self.placement)
+    performance[games, self.seat_player] = self.placement
+    dice_left = np.empty_like(self.num_dice)
+    dice_left[games, self.seat_player] = self.num_dice
+
+    if len(self.call_players) > 0:
+      call_players = np.concatenate(self.call_players)
+      call_probabilities = np.concatenate(self.call_probabilities)
+    else:
+      call_players = np.zeros(0, dtype=np.int64)
+      call_probabilities = np.zeros(0)
+
+    results = {}
+    num_players = len(self.players)
+    for i, player in enumerate(self.players):
+      placings = performance[:, i]
+      dice = dice_left[:, i]
+      probabilities = call_probabilities[call_players == i]
+      call_bins = np.minimum((probabilities * PlayerStats.CALL_HISTOGRAM_BINS).astype(np.int64), PlayerStats.CALL_HISTOGRAM_BINS - 1)
+
+      stats = PlayerStats(player.stats.keep_samples)
+      stats.placements = np.bincount(placings, minlength=num_players).tolist()
+      stats.performance_sum = int(placings.sum())
+      stats.games_won_with_dice = int((dice > 0).sum())
+      stats.winning_dice_sum = int(dice.sum())
+      stats.bids = int(self.bids[i])
+      stats.num_calls = len(probabilities)
+      stats.call_probability_sum = float(probabilities.sum())
+      stats.call_histogram = np.bincount(call_bins, minlength=PlayerStats.CALL_HISTOGRAM_BINS).tolist()
+      stats.bids_called = int(self.bids_called[i])
+      stats.successful_bids = int(self.successful_bids[i])
+      stats.successful_calls = int(self.successful_calls[i])
+      stats.calls_out_of_turn = int(self.calls_out_of_turn[i])
+      stats.forced_calls = int(self.forced_calls[i])
+      if stats.keep_samples:
+        stats.performance = placings.tolist()
+        stats.dice_left = dice.tolist()
+        stats.calls = probabilities.tolist()
+      results[player.name] = stats
+    return results
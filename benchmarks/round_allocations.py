@@ -0,0 +1,91 @@
+"""
+Measures what a single Round costs to play: wall time and the peak memory
+allocated while it is played, averaged over many rounds.
+Then the same per bid for long rounds (two players with lots of dice, so hundreds of bids a round):
+the time and memory of a bid shouldn't grow with the length of the round.
+
+  python -m benchmarks.round_allocations
+"""
+import argparse
+import random
+import time
+import tracemalloc
+
+from game.round import Round
+from player.player import Player
+from player.strategy.strategy import Strategy
+from player.strategy.jeff.bad_strategy import BadStrategy
+
+
+def make_players(num_players):
+  players = [Player(f"Player {i}", Strategy) for i in range(0, num_players - 1)]
+  players.append(Player("Jeff", BadStrategy))
+  return players
+
+
+def time_rounds(players, num_rounds):
+  start = time.perf_counter()
+  for _ in range(0, num_rounds):
+    Round(players, False).play()
+  return (time.perf_counter() - start) / num_rounds
+
+
+def trace_rounds(players, num_rounds):
+  """
+  Average peak memory allocated while a round is played.
+  """
+  peak = 0
+  tracemalloc.start()
+  for _ in range(0, num_rounds):
+    round = Round(players, False)
+    tracemalloc.reset_peak()
+    start = tracemalloc.get_traced_memory()[0]
+    round.play()
+    peak += tracemalloc.get_traced_memory()[1] - start
+  tracemalloc.stop()
+  return peak / num_rounds
+
+
+def long_rounds(num_dice, num_rounds):
+  """
+  Bids per round, time per bid, and peak memory allocated per bid, for rounds between two players with `num_dice` each.
+  """
+  players = [Player(f"Player {i}", Strategy, num_dice) for i in range(0, 2)]
+  bids = 0
+  elapsed = 0.0
+  for _ in range(0, num_rounds):
+    round = Round(players, False)
+    start = time.perf_counter()
+    round.play()
+    elapsed += time.perf_counter() - start
+    bids += len(round.history)
+  return bids / num_rounds, elapsed / bids, trace_rounds(players, num_rounds) / (bids / num_rounds)
+
+
+def main():
+  parser = argparse.ArgumentParser(description="Per-round cost of Round.play")
+  parser.add_argument("--players", type=int, nargs="+", default=[2, 5, 10])
+  parser.add_argument("--rounds", type=int, default=500)
+  parser.add_argument("--traced-rounds", type=int, default=200)
+  parser.add_argument("--seed", type=int, default=0)
+  parser.add_argument("--long-round-dice", type=int, nargs="+", default=[100, 1600, 6400])
+  parser.add_argument("--long-rounds", type=int, default=5)
+  args = parser.parse_args()
+
+  print(f"{'players':>8} {'us/round':>10} {'peak KiB':>10}")
+  for num_players in args.players:
+    random.seed(args.seed)
+    players = make_players(num_players)
+    per_round = time_rounds(players, args.rounds)
+    peak = trace_rounds(players, args.traced_rounds)
+    print(f"{num_players:>8} {per_round * 1e6:>10.1f} {peak / 1024:>10.1f}")
+
+  print(f"\n{'dice':>8} {'bids':>10} {'us/bid':>10} {'peak B/bid':>10}")
+  for num_dice in args.long_round_dice:
+    random.seed(args.seed)
+    bids, per_bid, peak = long_rounds(num_dice, args.long_rounds)
+    print(f"{num_dice:>8} {bids:>10.0f} {per_bid * 1e6:>10.2f} {peak:>10.1f}")
+
+
+if __name__ == "__main__":
+  main()
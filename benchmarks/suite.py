@@ -0,0 +1,196 @@
+"""
+Throughput and decision-latency benchmarks for the engine and the shipped strategies.
+
+  python -m benchmarks.suite --output results.json
+  python -m benchmarks.suite --compare results.json
+
+Results are written as JSON. With --compare, each result is checked against a saved
+run and the command fails if anything got slower by more than --tolerance.
+"""
+import argparse
+import contextlib
+import io
+import json
+import platform
+import random
+import sys
+import time
+import timeit
+
+from game.bid import Bid
+from game.round import Round
+from liars_dice import LiarDiceGame
+from player.player import Player
+from player.strategy.strategy import Strategy
+from player.strategy.jeff.bad_strategy import BadStrategy
+from tournament import Tournament
+
+TABLE_SIZES = [2, 5, 10, 20, 50]
+STRATEGIES = [Strategy, BadStrategy]
+
+
+def make_players(num_players):
+  """
+  A table of default strategies, with a BadStrategy in the last seat.
+  """
+  players = [Player(f"Player {i}", Strategy) for i in range(0, num_players - 1)]
+  players.append(Player("Jeff", BadStrategy))
+  return players
+
+
+def result(value, unit, higher_is_better):
+  return {"value": value, "unit": unit, "higher_is_better": higher_is_better}
+
+
+def per_call_ns(func):
+  """
+  Average time of a single call to `func`, in nanoseconds.
+  """
+  timer = timeit.Timer(func)
+  number, _ = timer.autorange()
+  return min(timer.repeat(repeat=3, number=number)) / number * 1e9
+
+
+def bench_play_game(num_players, min_time, seed):
+  """
+  Plays whole games until `min_time` has passed (at least one game).
+  """
+  rng = random.Random(seed)
+  games = 0
+  rounds = 0
+  start = time.perf_counter()
+  while games == 0 or time.perf_counter() - start < min_time:
+    game = LiarDiceGame(make_players(num_players), rng=rng)
+    game.play_game()
+    games += 1
+    rounds += game.round_number
+  elapsed = time.perf_counter() - start
+  return {
+    f"play_game/players={num_players}/games_per_sec": result(games / elapsed, "games/s", True),
+    f"play_game/players={num_players}/rounds_per_sec": result(rounds / elapsed, "rounds/s", True),
+  }
+
+
+def bench_tournament(num_players, num_games, seed):
+  tournament = Tournament(make_players(num_players), num_games, seed=seed)
+  start = time.perf_counter()
+  with contextlib.redirect_stdout(io.StringIO()):
+    tournament.run()
+  elapsed = time.perf_counter() - start
+  return {
+    f"tournament/players={num_players}/games_per_sec": result(num_games / elapsed, "games/s", True),
+  }
+
+
+def make_round(num_players, seed):
+  """
+  A round part way through, with dice rolled and a middling bid on the table.
+  """
+  round = Round(make_players(num_players), False, random.Random(seed))
+  round.roll_dice()
+  total_dice = sum(p.num_dice for p in round.players)
+  round.current_bid = Bid(max(1, total_dice // 3), 4)
+  round.history = ((round.players[-1].name, round.current_bid),)
+  return round
+
+
+def bench_engine_calls(num_players, seed):
+  round = make_round(num_players, seed)
+  player = round.players[0]
+  next_bid = Bid(round.current_bid.number_of_dice + 1, 4)
+  prefix = f"players={num_players}"
+  return {
+    f"round.compute_probability/{prefix}/ns": result(per_call_ns(lambda: round.compute_probability(player)), "ns", False),
+    f"round.bid_is_valid/{prefix}/ns": result(per_call_ns(lambda: round.bid_is_valid(next_bid)), "ns", False),
+    f"bid.is_higher_than/{prefix}/ns": result(per_call_ns(lambda: next_bid.is_higher_than(round.current_bid)), "ns", False),
+  }
+
+
+def bench_strategy(strategy_class, num_players, seed):
+  round = make_round(num_players, seed)
+  player = round.players[0]
+  strategy = strategy_class(player.name)
+  strategy.prepare_for_new_round(round.dice_counts, player.dice)
+  probability = round.compute_probability(player)
+  turns = round.turns_until_player_turn(player)
+  prefix = f"{strategy_class.__name__}/players={num_players}"
+  make_bid = lambda: strategy.make_bid(round.history, round.current_bid, round.dice_counts, len(round.players) - 1, player.dice)
+  challenge_bid = lambda: strategy.challenge_bid(
+    round.history, round.current_bid, round.dice_counts, probability, turns, player.dice, False
+  )
+  prepare = lambda: strategy.prepare_for_new_round(round.dice_counts, player.dice)
+  return {
+    f"{prefix}/make_bid/ns": result(per_call_ns(make_bid), "ns", False),
+    f"{prefix}/challenge_bid/ns": result(per_call_ns(challenge_bid), "ns", False),
+    f"{prefix}/prepare_for_new_round/ns": result(per_call_ns(prepare), "ns", False),
+  }
+
+
+def run_benchmarks(sizes, min_time, tournament_games, seed):
+  results = {}
+  for num_players in sizes:
+    results.update(bench_engine_calls(num_players, seed))
+    for strategy_class in STRATEGIES:
+      results.update(bench_strategy(strategy_class, num_players, seed))
+    results.update(bench_play_game(num_players, min_time, seed))
+    if tournament_games > 0:
+      results.update(bench_tournament(num_players, tournament_games, seed))
+  return results
+
+
+def compare(results, baseline, tolerance):
+  """
+  Prints how each result changed from the baseline, and returns the names of the ones that regressed.
+  """
+  regressions = []
+  print(f"{'benchmark':<60} {'baseline':>12} {'current':>12} {'change':>8}")
+  for name, current in results.items():
+    if name not in baseline:
+      print(f"{name:<60} {'-':>12} {current['value']:>12.1f} {'new':>8}")
+      continue
+    old = baseline[name]["value"]
+    change = (current["value"] - old) / old if old else 0.0
+    slower = -change if current["higher_is_better"] else change
+    flag = ""
+    if slower > tolerance:
+      regressions.append(name)
+      flag = " REGRESSION"
+    print(f"{name:<60} {old:>12.1f} {current['value']:>12.1f} {change:>+8.1%}{flag}")
+  return regressions
+
+
+def main():
+  parser = argparse.ArgumentParser(description="Liar's Dice engine and strategy benchmarks")
+  parser.add_argument("--players", type=int, nargs="+", default=TABLE_SIZES, help="table sizes to benchmark")
+  parser.add_argument("--min-time", type=float, default=1.0, help="seconds to spend playing games per table size")
+  parser.add_argument("--tournament-games", type=int, default=10, help="games per Tournament.run benchmark, 0 to skip")
+  parser.add_argument("--seed", type=int, default=0)
+  parser.add_argument("--output", help="write the results to this JSON file")
+  parser.add_argument("--compare", help="JSON results of a previous run to compare against")
+  parser.add_argument("--tolerance", type=float, default=0.1, help="slowdown allowed before a result is a regression")
+  args = parser.parse_args()
+
+  results = run_benchmarks(args.players, args.min_time, args.tournament_games, args.seed)
+  report = {
+    "python": platform.python_version(),
+    "platform": platform.platform(),
+    "results": results,
+  }
+
+  if args.output:
+    with open(args.output, "w") as f:
+      json.dump(report, f, indent=2)
+
+  if args.compare:
+    with open(args.compare) as f:
+      baseline = json.load(f)["results"]
+    regressions = compare(results, baseline, args.tolerance)
+    if len(regressions) > 0:
+      print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.tolerance:.0%}")
+      sys.exit(1)
+  elif not args.output:
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+  main()
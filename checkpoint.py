@@ -0,0 +1,37 @@
+import os
+import pickle
+import time
+
+
+class Checkpoint:
+  """
+  Saves how far a tournament has got, so it can pick up where it left off if it's interrupted.
+  A checkpoint is written at most every `interval` seconds, so it costs next to nothing however fast
+  games are played. It's written to a temporary file first and then moved over the last one,
+  so there's always a complete checkpoint on disk.
+  """
+  def __init__(self, path: str, interval: float = 60.0):
+    self.path = path
+    self.interval = interval
+    self.next_save = time.monotonic() + interval
+
+  def due(self) -> bool:
+    return time.monotonic() >= self.next_save
+
+  def save(self, state: dict):
+    temp_path = f"{self.path}.tmp"
+    with open(temp_path, "wb") as f:
+      pickle.dump(state, f, pickle.HIGHEST_PROTOCOL)
+      f.flush()
+      os.fsync(f.fileno())
+    os.replace(temp_path, self.path)
+    self.next_save = time.monotonic() + self.interval
+
+  def load(self):
+    """
+    The last state saved, or None if there's no checkpoint yet.
+    """
+    if not os.path.exists(self.path):
+      return None
+    with open(self.path, "rb") as f:
+      return pickle.load(f)
@@ -0,0 +1,345 @@
+"""
+Generates (state, action, outcome) samples of every decision made in a run of games, for training strategies.
+
+  python decision_dataset.py --games 1000000 --processes 8 --output decisions
+
+Each decision is a fixed-width record (see `DECISION`), packed as it's made and copied in large batches
+straight into preallocated, memory-mapped .npy shards. Every process writes its own shards.
+`DecisionDataset` streams them back in batches for a training loop.
+"""
+import argparse
+import copy
+import glob
+import os
+import random
+import struct
+from multiprocessing import Pool
+from typing import Iterator, List
+
+import numpy as np
+
+from game.bid import Bid
+from liars_dice import LiarDiceGame
+from player.player import Player
+from player.strategy import strategy
+from player.strategy.jeff import bad_strategy
+from tournament import Tournament
+
+MAX_PLAYERS = 8
+HISTORY = 8  # most recent bids kept in a record
+SHARD_ROWS = 1 << 20
+
+# Actions. An invalid bid is recorded as the call it forces
+# (an invalid first bid just loses a die, and is recorded as a call with no current bid).
+PASS = 0
+CALL = 1
+BID = 2
+
+# Seats are relative to the player making the decision: 0 is them, 1 the next player in turn order, and so on
+DECISION = np.dtype([
+  ("game", "<u8"),  # index of the game in the run
+  ("dice", "u1", (6,)),  # how many of my dice show each face, 1 to 6
+  ("dice_counts", "u1", (MAX_PLAYERS,)),  # dice each seat has
+  ("history_length", "<u2"),  # bids made so far this round
+  ("history", "u1", (HISTORY, 3)),  # the latest bids, latest first: (number of dice, face value, seat)
+  ("bid", "u1", (2,)),  # current bid (number of dice, face value), (0, 0) before the first bid
+  ("turns_until_my_turn", "u1"),
+  ("out_of_turn", "u1"),
+  ("probability", "<f4"),  # probability_of_truth given to challenge_bid, NaN for make_bid
+  ("action", "u1"),  # PASS, CALL or BID
+  ("action_bid", "u1", (2,)),  # the bid made, (0, 0) otherwise
+  ("loser", "u1"),  # seat of the player who lost a die that round
+])
+# Everything but the loser, which isn't known until the round is over
+DECISION_STATE = struct.Struct(f"<Q6B{MAX_PLAYERS}BH{HISTORY * 3}B2BBBfB2B")
+
+
+class ShardWriter:
+  """
+  Copies packed records into .npy shards of `shard_rows` records, named `prefix`-00000.npy, -00001.npy...
+  Each shard is preallocated and written through a memory map. The last one is cut down to the records in it.
+  """
+  FLUSH_SIZE = 1 << 20
+
+  def __init__(self, directory: str, prefix: str, shard_rows: int = SHARD_ROWS):
+    self.directory = directory
+    self.prefix = prefix
+    self.shard_rows = shard_rows
+    self.buffer = bytearray()
+    self.shard = None
+    self.rows = 0  # records in the current shard
+    self.paths = []
+    self.total_rows = 0
+
+  def write(self, record: bytes):
+    self.buffer += record
+    if len(self.buffer) >= ShardWriter.FLUSH_SIZE:
+      self.flush()
+
+  def flush(self):
+    records = np.frombuffer(self.buffer, dtype=DECISION)
+    while len(records) > 0:
+      if self.shard is None:
+        self.open_shard()
+      count = min(len(records), self.shard_rows - self.rows)
+      self.shard[self.rows:self.rows + count] = records[:count]
+      self.rows += count
+      self.total_rows += count
+      records = records[count:]
+      if self.rows == self.shard_rows:
+        self.close_shard()
+    # the old buffer can't be resized while `records` looks into it
+    self.buffer = bytearray()
+
+  def open_shard(self):
+    path = os.path.join(self.directory, f"{self.prefix}-{len(self.paths):05d}.npy")
+    self.shard = np.lib.format.open_memmap(path, mode="w+", dtype=DECISION, shape=(self.shard_rows,))
+    self.paths.append(path)
+    self.rows = 0
+
+  def close_shard(self):
+    path = self.paths[-1]
+    self.shard.flush()
+    shard, self.shard = self.shard, None
+    if self.rows < self.shard_rows:
+      temp_path = f"{path}.tmp"
+      trimmed = np.lib.format.open_memmap(temp_path, mode="w+", dtype=DECISION, shape=(self.rows,))
+      trimmed[:] = shard[:self.rows]
+      trimmed.flush()
+      del trimmed
+      os.replace(temp_path, path)
+
+  def close(self):
+    self.flush()
+    if self.shard is not None:
+      self.close_shard()
+
+
+class DecisionRecorder:
+  """
+  Packs every decision made in a game, as reported by each player's `RecordingStrategy`.
+  It's also the rounds' recorder, which is how it hears who lost each round: the round's records
+  are held until then, and written out with the loser filled in.
+  """
+  def __init__(self, writer: ShardWriter):
+    self.writer = writer
+    self.game_index = 0
+    self.pending = []  # (packed state, my seat) of the decisions made this round
+    self.dice_counts = None
+    self.seats = {}  # name -> seat in turn order, for the round's `dice_counts`
+    self.round_players = {}  # name -> player_state, for the round's `dice_counts`
+
+  def player_state(self, dice_counts, name, my_dice):
+    """
+    (my seat, my dice by face + dice of each seat), which stay the same for the whole round.
+    """
+    # every player in a round is given the same dice_counts tuple
+    if dice_counts is not self.dice_counts:
+      if len(dice_counts) > MAX_PLAYERS:
+        raise ValueError(f"Records have room for {MAX_PLAYERS} players")
+      self.dice_counts = dice_counts
+      self.seats = {player_name: seat for seat, (player_name, _) in enumerate(dice_counts)}
+      self.round_players = {}
+    state = self.round_players.get(name)
+    if state is None:
+      me = self.seats[name]
+      num_players = len(dice_counts)
+      dice = [0] * 6
+      for d in my_dice:
+        dice[d - 1] += 1
+      counts = [dice_counts[(me + seat) % num_players][1] for seat in range(0, num_players)]
+      state = (me, dice + counts + [0] * (MAX_PLAYERS - num_players))
+      self.round_players[name] = state
+    return state
+
+  def record(self, name, round_history, current_bid, dice_counts, probability, turns_until_my_turn, my_dice, out_of_turn, action, bid):
+    me, dice_and_counts = self.player_state(dice_counts, name, my_dice)
+    num_players = len(dice_counts)
+    history = []
+    for bidder, past_bid in reversed(round_history[-HISTORY:]):
+      history += (past_bid.number_of_dice, past_bid.face_value, (self.seats[bidder] - me) % num_players)
+    history += [0] * (HISTORY * 3 - len(history))
+    self.pending.append((DECISION_STATE.pack(
+      self.game_index,
+      *dice_and_counts,
+      len(round_history),
+      *history,
+      current_bid.number_of_dice if current_bid is not None else 0,
+      current_bid.face_value if current_bid is not None else 0,
+      turns_until_my_turn,
+      out_of_turn,
+      probability,
+      action,
+      bid.number_of_dice if bid is not None else 0,
+      bid.face_value if bid is not None else 0,
+    ), me))
+
+  def resolution(self, winner, loser, matching_dice=None):
+    loser_seat = self.seats[loser.name]
+    num_players = len(self.dice_counts)
+    for state, me in self.pending:
+      self.writer.write(state + bytes(((loser_seat - me) % num_players,)))
+    self.pending.clear()
+
+  # The rest of a recorder's events aren't needed
+
+  def game_start(self, players):
+    return
+
+  def roll(self, player):
+    return
+
+  def bid(self, player, bid):
+    return
+
+  def call(self, challenger, bidder, out_of_turn, probability, forced=False):
+    return
+
+  def elimination(self, player, placing):
+    return
+
+  def game_end(self, standings):
+    return
+
+
+class RecordingStrategy:
+  """
+  Plays a strategy, reporting each of its decisions to a `DecisionRecorder`.
+  """
+  # the probability goes in the record, so it's worked out whether or not the strategy reads it
+  READS_PROBABILITY_OF_TRUTH = True
+
+  def __init__(self, strategy, recorder: DecisionRecorder):
+    self.name = strategy.name
+    self.strategy = strategy
+    self.recorder = recorder
+
+  def reset(self):
+    if hasattr(self.strategy, 'reset'):
+      self.strategy.reset()
+
+  def prepare_for_new_round(self, dice_counts, my_dice):
+    if hasattr(self.strategy, 'prepare_for_new_round'):
+      self.strategy.prepare_for_new_round(dice_counts, my_dice)
+
+  def challenge_bid(self, round_history, current_bid, dice_counts, probability_of_truth, turns_until_my_turn, my_dice, out_of_turn) -> bool:
+    challenge = self.strategy.challenge_bid(
+      round_history, current_bid, dice_counts, probability_of_truth, turns_until_my_turn, my_dice, out_of_turn
+    )
+    self.recorder.record(
+      self.name, round_history, current_bid, dice_counts, float(probability_of_truth), turns_until_my_turn, my_dice,
+      out_of_turn, CALL if challenge else PASS, None
+    )
+    return challenge
+
+  def make_bid(self, round_history, current_bid, dice_counts, turns_until_my_turn, my_dice) -> Bid:
+    bid = self.strategy.make_bid(round_history, current_bid, dice_counts, turns_until_my_turn, my_dice)
+    # the same checks as Round.bid_is_valid
+    total_dice = sum(num_dice for _, num_dice in dice_counts)
+    valid = (
+      isinstance(bid, Bid) and bid.number_of_dice <= total_dice and 1 < bid.face_value <= 6 and bid.is_higher_than(current_bid)
+    )
+    self.recorder.record(
+      self.name, round_history, current_bid, dice_counts, float("nan"), turns_until_my_turn, my_dice, False,
+      BID if valid else CALL, bid if valid else None
+    )
+    return bid
+
+
+def generate_chunk(args):
+  """
+  Plays games [start, stop) and writes their decisions to shards named after the chunk.
+  Returns the shard paths and how many records were written.
+  """
+  players, start, stop, seed, directory, chunk, shard_rows = args
+  writer = ShardWriter(directory, f"decisions-{chunk:03d}", shard_rows)
+  recorder = DecisionRecorder(writer)
+  players = copy.deepcopy(players)
+  for player in players:
+    player.strategy = RecordingStrategy(player.strategy, recorder)
+  for game_index in range(start, stop):
+    recorder.game_index = game_index
+    LiarDiceGame(players, rng=Tournament.game_rng(seed, game_index), recorder=recorder, reuse_players=True).play_game()
+  writer.close()
+  return writer.paths, writer.total_rows
+
+
+def generate(players: List[Player], num_games: int, directory: str, seed=None, num_processes=1, shard_rows=SHARD_ROWS):
+  """
+  Plays `num_games` games, split across `num_processes` processes, and writes a record of every decision
+  to shards in `directory`. Games are seeded the same way as `Tournament`'s.
+  Returns the number of records written.
+  """
+  os.makedirs(directory, exist_ok=True)
+  if seed is None:
+    seed = random.randrange(1 << 32)
+  num_chunks = max(1, min(num_games, num_processes))
+  args = [
+    (players, c * num_games // num_chunks, (c + 1) * num_games // num_chunks, seed, directory, c, shard_rows)
+    for c in range(0, num_chunks)
+  ]
+  if num_processes > 1:
+    with Pool(num_processes) as pool:
+      results = pool.map(generate_chunk, args)
+  else:
+    results = [generate_chunk(a) for a in args]
+  return sum(rows for _, rows in results)
+
+
+class DecisionDataset:
+  """
+  Reads the shards in a directory through memory maps, so a training loop can stream through
+  far more records than fit in memory.
+  """
+  def __init__(self, directory: str):
+    self.paths = sorted(glob.glob(os.path.join(directory, "*.npy")))
+
+  def shards(self) -> Iterator[np.ndarray]:
+    for path in self.paths:
+      yield np.load(path, mmap_mode="r")
+
+  def __len__(self):
+    return sum(len(shard) for shard in self.shards())
+
+  def batches(self, batch_size: int, shuffle=False, seed=None) -> Iterator[np.ndarray]:
+    """
+    Yields the records in batches of up to `batch_size`, one shard at a time.
+    With `shuffle`, the shards are visited in a random order and their records shuffled within each shard.
+    Unshuffled batches are views into the memory map; shuffled ones are copies.
+    """
+    rng = np.random.default_rng(seed)
+    paths = list(self.paths)
+    if shuffle:
+      rng.shuffle(paths)
+    for path in paths:
+      shard = np.load(path, mmap_mode="r")
+      order = rng.permutation(len(shard)) if shuffle else None
+      for start in range(0, len(shard), batch_size):
+        if order is None:
+          yield shard[start:start + batch_size]
+        else:
+          # sorted, so each batch reads the shard front to back
+          yield shard[np.sort(order[start:start + batch_size])]
+
+
+def main():
+  parser = argparse.ArgumentParser(description="Write a dataset of Liar's Dice decisions")
+  parser.add_argument("--games", type=int, default=10000)
+  parser.add_argument("--processes", type=int, default=1)
+  parser.add_argument("--output", default="decisions", help="directory to write the shards to")
+  parser.add_argument("--seed", type=int, default=None)
+  parser.add_argument("--shard-rows", type=int, default=SHARD_ROWS, help="records in each shard")
+  args = parser.parse_args()
+  players = [
+    Player("Alice", strategy.Strategy),
+    Player("Bob", strategy.Strategy),
+    Player("Charlie", strategy.Strategy),
+    Player("Diana", strategy.Strategy),
+    Player("Jeff", bad_strategy.BadStrategy)
+  ]
+  rows = generate(players, args.games, args.output, args.seed, args.processes, args.shard_rows)
+  print(f"Wrote {rows} decisions to {args.output}")
+
+
+if __name__ == "__main__":
+  main()
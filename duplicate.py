@@ -0,0 +1,253 @@
+import copy
+import itertools
+import math
+import random
+from multiprocessing import Pool
+from typing import Dict, List, Tuple
+
+from utils.color_printer import *
+from game.round import Round
+from liars_dice import LiarDiceGame
+from player.player import Player, DICE_FACES
+from player.player_stats import PlayerStats
+from player.strategy import strategy
+from player.strategy.jeff import bad_strategy
+from tournament import Tournament
+
+
+class Deal:
+  """
+  The dice each seat rolls in every round of a game, drawn from the deal's random number generator.
+  Every seat is dealt a full set of dice each round and rolls as many of them as it has left,
+  so a seat's dice don't depend on anything that happens at the rest of the table.
+  Rounds are dealt as they're first needed, so a deal can be shared by every game played with it.
+  """
+  def __init__(self, rng: random.Random, num_seats: int, max_dice: int):
+    self.rng = rng
+    self.num_seats = num_seats
+    self.max_dice = max_dice
+    self.rounds = []
+
+  def dice(self, round_number: int, seat: int, num_dice: int) -> Tuple[int, ...]:
+    while len(self.rounds) < round_number:
+      self.rounds.append(self.rng.choices(DICE_FACES, k=self.num_seats * self.max_dice))
+    start = seat * self.max_dice
+    return tuple(self.rounds[round_number - 1][start:start + num_dice])
+
+
+class DuplicateRound(Round):
+  """
+  A round whose dice come from a `Deal`, by seat, instead of being rolled.
+  """
+  def __init__(self, players: List[Player], verbose: bool, deal: Deal, round_number: int, seating, recorder=None, timer=None):
+    super().__init__(players, verbose, recorder=recorder, timer=timer)
+    self.deal = deal
+    self.round_number = round_number
+    self.seating = seating
+
+  def roll_dice(self):
+    rolls = []
+    for p in self.players:
+      rolls.extend(self.deal.dice(self.round_number, self.seating.seat(p), p.num_dice))
+    self.hand_out_dice(rolls)
+    return rolls
+
+
+class DuplicateGame(LiarDiceGame):
+  """
+  A game played with the dice of a `Deal`. The players sit in the order they're given, and the first seat starts.
+  """
+  def __init__(self, players: List[Player], deal: Deal, verbose=False, recorder=None, timer=None, reuse_players=False):
+    super().__init__(players, verbose, recorder=recorder, timer=timer, shuffle=False, reuse_players=reuse_players)
+    self.deal = deal
+
+  def new_round(self, starting_seat, seating):
+    self.round_number += 1
+    if self.verbose:
+      print(f"\n\n----- {ColorPrinter.BLUE_TEXT}Round {self.round_number}{ColorPrinter.RESET_TEXT} -----")
+    return DuplicateRound(
+      seating.in_turn_order(starting_seat), self.verbose, self.deal, self.round_number, seating, self.recorder, self.timer
+    )
+
+
+class DuplicateScores:
+  """
+  Each player's share of the wins in every deal, summed up so their means and standard errors can be worked out,
+  on their own and as the differences between each pair of players.
+  Scores from separate runs of deals can be added together with `update`.
+  """
+  def __init__(self, names: List[str]):
+    self.names = list(names)
+    self.deals = 0
+    self.sums = {name: 0.0 for name in names}
+    self.squares = {name: 0.0 for name in names}
+    self.pair_sums = {pair: 0.0 for pair in itertools.combinations(names, 2)}
+    self.pair_squares = {pair: 0.0 for pair in itertools.combinations(names, 2)}
+
+  def record_deal(self, scores: Dict[str, float]):
+    self.deals += 1
+    for name in self.names:
+      self.sums[name] += scores[name]
+      self.squares[name] += scores[name] * scores[name]
+    for a, b in self.pair_sums:
+      difference = scores[a] - scores[b]
+      self.pair_sums[(a, b)] += difference
+      self.pair_squares[(a, b)] += difference * difference
+
+  def update(self, other: 'DuplicateScores'):
+    self.deals += other.deals
+    for name in self.names:
+      self.sums[name] += other.sums[name]
+      self.squares[name] += other.squares[name]
+    for pair in self.pair_sums:
+      self.pair_sums[pair] += other.pair_sums[pair]
+      self.pair_squares[pair] += other.pair_squares[pair]
+
+  def mean_and_error(self, total: float, squares: float) -> Tuple[float, float]:
+    """
+    The mean of a score over the deals, and its standard error, from the sum and sum of squares of the score.
+    """
+    if self.deals == 0:
+      return 0.0, math.inf
+    mean = total / self.deals
+    if self.deals == 1:
+      return mean, math.inf
+    variance = max(squares - self.deals * mean * mean, 0.0) / (self.deals - 1)
+    return mean, math.sqrt(variance / self.deals)
+
+  def win_rate(self, name: str) -> Tuple[float, float]:
+    """
+    (win rate, standard error) of a player.
+    """
+    return self.mean_and_error(self.sums[name], self.squares[name])
+
+  def difference(self, a: str, b: str) -> Tuple[float, float]:
+    """
+    (a's win rate - b's, standard error), from the difference between them in each deal.
+    """
+    if (a, b) in self.pair_sums:
+      return self.mean_and_error(self.pair_sums[(a, b)], self.pair_squares[(a, b)])
+    mean, error = self.mean_and_error(self.pair_sums[(b, a)], self.pair_squares[(b, a)])
+    return -mean, error
+
+
+class DuplicateTournament:
+  """
+  Plays Liar's Dice the way duplicate bridge is played, to compare strategies with far fewer games.
+  Every deal fixes the dice each seat rolls, round by round, and is played once for every rotation
+  of the seating, so every player sits in every seat and is dealt every seat's dice.
+  Each deal seats the players in a new random order before rotating them, so nobody always sits next to the same player.
+
+  A player's score for a deal is their share of its games' wins, and players are compared deal by deal
+  (a paired comparison), so whatever luck the dice bring to a deal counts the same for everyone in it.
+  How much that helps depends on how alike the players are: the same dice only lead to the same games if
+  the players make the same moves. Two close strategies heads-up need around half the games they would
+  in a `Tournament`, while very different strategies, or bigger tables, gain little or nothing. The comparison
+  with independent games is printed for each pair.
+  """
+  def __init__(self, players: List[Player], num_deals=1000, seed=None, num_processes=1, z=1.96):
+    self.players = players
+    self.num_deals = num_deals
+    self.seed = seed
+    self.num_processes = num_processes
+    # Intervals are printed `z` standard errors wide on each side
+    self.z = z
+    self.player_map = {p.name: p for p in players}
+    self.scores = None
+
+  def rotations(self, players: List[Player]) -> List[List[Player]]:
+    return [players[r:] + players[:r] for r in range(0, len(players))]
+
+  def deal(self, seed, deal_index, players: List[Player]) -> Tuple[List[Player], Deal]:
+    """
+    The seating order and dice of a deal, both drawn from the deal's own random number generator,
+    so any deal can be played again from (seed, deal_index).
+    """
+    rng = Tournament.game_rng(seed, deal_index)
+    order = rng.sample(players, len(players))
+    return order, Deal(rng, len(players), max(p.starting_dice for p in players))
+
+  def play_deals(self, start, stop, seed=None) -> Tuple[Dict[str, PlayerStats], DuplicateScores]:
+    """
+    Plays deals [start, stop), every rotation of each, and returns the stats collected over them
+    keyed by player name, and the players' scores.
+    """
+    players = copy.deepcopy(self.players)
+    for player in players:
+      player.stats = PlayerStats(player.stats.keep_samples)
+    results = {p.name: PlayerStats(p.stats.keep_samples) for p in players}
+    scores = DuplicateScores([p.name for p in players])
+    for deal_index in range(start, stop):
+      order, deal = self.deal(seed, deal_index, players)
+      wins = {p.name: 0 for p in players}
+      rotations = self.rotations(order)
+      for seating in rotations:
+        standings = DuplicateGame(seating, deal, reuse_players=True).play_game()
+        for s in standings:
+          results[s.name].update(s.stats)
+        wins[standings[0].name] += 1
+      scores.record_deal({name: won / len(rotations) for name, won in wins.items()})
+    return results, scores
+
+  def play_deals_chunk(self, args):
+    return self.play_deals(*args)
+
+  def chunk_ranges(self):
+    num_chunks = min(self.num_deals, self.num_processes * Tournament.CHUNKS_PER_PROCESS)
+    return [(c * self.num_deals // num_chunks, (c + 1) * self.num_deals // num_chunks) for c in range(0, num_chunks)]
+
+  def run(self):
+    seed = self.seed
+    if seed is None and self.num_processes > 1:
+      # Workers need their own seeds, otherwise forked processes all share the same random state
+      seed = random.randrange(1 << 32)
+
+    if self.num_processes > 1 and self.num_deals > 1:
+      results = {p.name: PlayerStats(p.stats.keep_samples) for p in self.players}
+      self.scores = DuplicateScores([p.name for p in self.players])
+      args = [(start, stop, seed) for start, stop in self.chunk_ranges()]
+      with Pool(self.num_processes) as pool:
+        for chunk_results, chunk_scores in pool.imap(self.play_deals_chunk, args):
+          for name, stats in chunk_results.items():
+            results[name].update(stats)
+          self.scores.update(chunk_scores)
+    else:
+      results, self.scores = self.play_deals(0, self.num_deals, seed)
+
+    for name, stats in results.items():
+      self.player_map[name].stats.update(stats)
+
+    ColorPrinter.cprint(Color.CYAN, "\n******************** RESULTS ********************")
+    for player in self.players:
+      ColorPrinter.cprint(Color.BLUE, player.name)
+      print(player.stats)
+    self.print_scores()
+
+  def print_scores(self):
+    scores = self.scores
+    games = scores.deals * len(self.players)
+    ranking = sorted(scores.names, key=lambda name: scores.sums[name], reverse=True)
+    ColorPrinter.cprint(Color.CYAN, f"\n******************** DUPLICATE ({scores.deals} deals, {games} games) ********************")
+    for name in ranking:
+      rate, error = scores.win_rate(name)
+      print(f"| {name} -- win rate: {rate:.3f} ± {self.z * error:.3f}")
+    for better, worse in itertools.combinations(ranking, 2):
+      difference, error = scores.difference(better, worse)
+      z = difference / error if error > 0 else (0.0 if difference == 0 else math.inf)
+      # the standard error of the difference from as many independent games, where at most one of them wins each game
+      better_rate, worse_rate = scores.win_rate(better)[0], scores.win_rate(worse)[0]
+      independent = math.sqrt(max(better_rate + worse_rate - difference * difference, 0.0) / games)
+      print(
+        f"| {better} - {worse}: {difference:+.3f} ± {self.z * error:.3f} (z = {z:.1f}),"
+        f" ± {self.z * independent:.3f} from as many independent games"
+      )
+
+
+if __name__ == "__main__":
+  players = [
+    Player("Alice", strategy.Strategy),
+    Player("Bob", strategy.Strategy),
+    Player("Charlie", strategy.Strategy),
+    Player("Jeff", bad_strategy.BadStrategy)
+  ]
+  DuplicateTournament(players, num_deals=1000, seed=42).run()
@@ -3,10 +3,36 @@ class Bid:
   A class representing a bid in Liar's Dice.
   A bid consists of a number_of_dice and a face_value (2-6),
   since '1' is treated as wild, we don't need to separate those out.
+  Bids are immutable, so they can be handed to strategies without copying.
   """
+  __slots__ = ('number_of_dice', 'face_value')
+
   def __init__(self, number_of_dice: int, face_value: int):
-    self.number_of_dice = number_of_dice
-    self.face_value = face_value  # 2 through 6 for the face guessed
+    object.__setattr__(self, 'number_of_dice', number_of_dice)
+    object.__setattr__(self, 'face_value', face_value)  # 2 through 6 for the face guessed
+
+  def __setattr__(self, name, value):
+    raise AttributeError(f"Bid is immutable, can't set '{name}'")
+
+  def __delattr__(self, name):
+    raise AttributeError(f"Bid is immutable, can't delete '{name}'")
+
+  def __eq__(self, other):
+    if not isinstance(other, Bid):
+      return NotImplemented
+    return self.number_of_dice == other.number_of_dice and self.face_value == other.face_value
+
+  def __hash__(self):
+    return hash((self.number_of_dice, self.face_value))
+
+  def __reduce__(self):
+    return (Bid, (self.number_of_dice, self.face_value))
+
+  def __copy__(self):
+    return self
+
+  def __deepcopy__(self, memo):
+    return self
 
   @property
   def is_valid(self):
@@ -0,0 +1,43 @@
+import time
+
+
+class DecisionTimer:
+  """
+  Times every strategy decision in a game, and enforces time budgets.
+
+  Each call to `prepare_for_new_round`, `make_bid` and `challenge_bid` is timed into the
+  player's stats. A strategy that takes longer than `decision_budget` seconds on a single
+  decision, or more than `game_budget` seconds over a whole game, is penalized the same
+  way an invalid bid is. Going over the game budget is penalized once, and then the player
+  gets a fresh `game_budget` for the rest of the game, so a slow strategy loses a die for
+  every `game_budget` seconds it takes rather than one for every decision after the first overrun.
+  Strategies can't be interrupted, so an overrun is only noticed once the decision returns.
+
+  Rounds only time decisions when they're given a timer, so leaving it out costs nothing.
+  """
+  def __init__(self, decision_budget: float = None, game_budget: float = None):
+    self.decision_budget = decision_budget
+    self.game_budget = game_budget
+    self.game_time = {}  # player -> seconds spent deciding this game, since their last game budget overrun
+
+  def new_game(self):
+    self.game_time.clear()
+
+  def call(self, player, decision: str, method, args):
+    """
+    Calls `method(*args)` for `player`, and returns its result along with whether it ran over budget.
+    """
+    start = time.perf_counter()
+    result = method(*args)
+    elapsed = time.perf_counter() - start
+
+    player.stats.record_latency(decision, elapsed)
+    used = self.game_time.get(player, 0.0) + elapsed
+    over_game_budget = self.game_budget is not None and used > self.game_budget
+    # once penalized, the player starts on a new allowance
+    self.game_time[player] = 0.0 if over_game_budget else used
+
+    overrun = over_game_budget or (self.decision_budget is not None and elapsed > self.decision_budget)
+    if overrun:
+      player.stats.timeouts += 1
+    return result, overrun
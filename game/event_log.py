@@ -0,0 +1,219 @@
+import mmap
+import os
+import struct
+from enum import IntEnum
+from typing import Dict, Iterator, List, Tuple
+
+from player.player_stats import PlayerStats
+
+
+class EventType(IntEnum):
+  GAME_START = 1
+  ROLL = 2
+  BID = 3
+  CALL = 4
+  RESOLUTION = 5
+  ELIMINATION = 6
+  GAME_END = 7
+
+
+# Every event is a header (event type, payload length) followed by its payload.
+# Players are referred to by their seat in the game, as listed by GAME_START.
+HEADER = struct.Struct("<BH")
+SEAT = struct.Struct("<H")
+BID = struct.Struct("<HHB")  # seat, number_of_dice, face_value
+CALL = struct.Struct("<HHBd")  # challenger seat, bidder seat, flags (CALL_OUT_OF_TURN, CALL_FORCED), probability
+RESOLUTION = struct.Struct("<HHH")  # winner seat, loser seat, matching dice
+ELIMINATION = struct.Struct("<HH")  # seat, placing
+STANDING = struct.Struct("<HB")  # seat, dice left
+
+CALL_OUT_OF_TURN = 1
+CALL_FORCED = 2  # the challenger had to call, having made an invalid bid
+# Names are prefixed with their length in a byte
+MAX_NAME_SIZE = 0xFF
+
+# Stands in for the matching dice when a round ended without a call (an invalid first bid)
+NO_COUNT = 0xFFFF
+
+
+class EventRecorder:
+  """
+  Writes game events to a compact binary file.
+  Events are packed into an in-memory buffer and written out in large chunks,
+  so recording costs a few struct packs per bid.
+  """
+  FLUSH_SIZE = 1 << 20
+
+  def __init__(self, path: str, offset: int = None):
+    if offset is None:
+      self.file = open(path, "wb")
+    else:
+      # pick up a log where it was at `offset`, dropping anything written after that
+      self.file = open(path, "r+b")
+      self.file.truncate(offset)
+      self.file.seek(offset)
+    self.buffer = bytearray()
+    self.seats = {}
+
+  def write(self, event_type: EventType, payload: bytes):
+    self.buffer += HEADER.pack(event_type, len(payload))
+    self.buffer += payload
+    if len(self.buffer) >= EventRecorder.FLUSH_SIZE:
+      self.flush()
+
+  def game_start(self, players):
+    names = [p.name.encode("utf-8") for p in players]
+    for p, name in zip(players, names):
+      if len(name) > MAX_NAME_SIZE:
+        raise ValueError(f"Player names in an event log can be at most {MAX_NAME_SIZE} bytes, {p.name!r} is {len(name)}")
+    self.seats = {p.name: seat for seat, p in enumerate(players)}
+    payload = bytearray(SEAT.pack(len(players)))
+    for name in names:
+      payload.append(len(name))
+      payload += name
+    self.write(EventType.GAME_START, payload)
+
+  def roll(self, player):
+    self.write(EventType.ROLL, SEAT.pack(self.seats[player.name]) + bytes(player.dice))
+
+  def bid(self, player, bid):
+    self.write(EventType.BID, BID.pack(self.seats[player.name], bid.number_of_dice, bid.face_value))
+
+  def call(self, challenger, bidder, out_of_turn: bool, probability: float, forced: bool = False):
+    flags = (CALL_OUT_OF_TURN if out_of_turn else 0) | (CALL_FORCED if forced else 0)
+    self.write(EventType.CALL, CALL.pack(self.seats[challenger.name], self.seats[bidder.name], flags, probability))
+
+  def resolution(self, winner, loser, matching_dice=None):
+    if matching_dice is None:
+      matching_dice = NO_COUNT
+    self.write(EventType.RESOLUTION, RESOLUTION.pack(self.seats[winner.name], self.seats[loser.name], matching_dice))
+
+  def elimination(self, player, placing: int):
+    self.write(EventType.ELIMINATION, ELIMINATION.pack(self.seats[player.name], placing))
+
+  def game_end(self, standings):
+    payload = bytearray(SEAT.pack(len(standings)))
+    for p in standings:
+      payload += STANDING.pack(self.seats[p.name], p.num_dice)
+    self.write(EventType.GAME_END, payload)
+
+  def flush(self):
+    self.file.write(self.buffer)
+    self.buffer.clear()
+
+  def sync(self) -> int:
+    """
+    Writes everything recorded so far to disk, and returns the size of the log.
+    """
+    self.flush()
+    self.file.flush()
+    os.fsync(self.file.fileno())
+    return self.file.tell()
+
+  def close(self):
+    self.flush()
+    self.file.close()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exc):
+    self.close()
+
+
+class EventLog:
+  """
+  Reads a file written by `EventRecorder` through a memory map.
+
+  Events are yielded as tuples starting with their `EventType`:
+  - (GAME_START, [names in seat order])
+  - (ROLL, seat, (dice...))
+  - (BID, seat, number_of_dice, face_value)
+  - (CALL, challenger seat, bidder seat, out_of_turn, probability, forced)
+  - (RESOLUTION, winner seat, loser seat, matching dice or None)
+  - (ELIMINATION, seat, placing)
+  - (GAME_END, [(seat, dice left) in order of placing])
+  """
+  def __init__(self, path: str):
+    self.path = path
+
+  def events(self) -> Iterator[Tuple]:
+    with open(self.path, "rb") as f:
+      if f.seek(0, 2) == 0:
+        return
+      with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        offset = 0
+        while offset < len(data):
+          event_type, length = HEADER.unpack_from(data, offset)
+          offset += HEADER.size
+          yield EventLog.decode(EventType(event_type), data, offset, length)
+          offset += length
+
+  @staticmethod
+  def decode(event_type: EventType, data, offset: int, length: int) -> Tuple:
+    if event_type == EventType.BID:
+      return (event_type, *BID.unpack_from(data, offset))
+    if event_type == EventType.CALL:
+      challenger, bidder, flags, probability = CALL.unpack_from(data, offset)
+      return (event_type, challenger, bidder, bool(flags & CALL_OUT_OF_TURN), probability, bool(flags & CALL_FORCED))
+    if event_type == EventType.ROLL:
+      seat, = SEAT.unpack_from(data, offset)
+      return (event_type, seat, tuple(data[offset + SEAT.size:offset + length]))
+    if event_type == EventType.RESOLUTION:
+      winner, loser, matching_dice = RESOLUTION.unpack_from(data, offset)
+      return (event_type, winner, loser, None if matching_dice == NO_COUNT else matching_dice)
+    if event_type == EventType.ELIMINATION:
+      return (event_type, *ELIMINATION.unpack_from(data, offset))
+    if event_type == EventType.GAME_START:
+      num_players, = SEAT.unpack_from(data, offset)
+      names = []
+      position = offset + SEAT.size
+      for _ in range(0, num_players):
+        size = data[position]
+        names.append(data[position + 1:position + 1 + size].decode("utf-8"))
+        position += 1 + size
+      return (event_type, names)
+    if event_type == EventType.GAME_END:
+      num_players, = SEAT.unpack_from(data, offset)
+      standings = [STANDING.unpack_from(data, offset + SEAT.size + i * STANDING.size) for i in range(0, num_players)]
+      return (event_type, standings)
+    raise ValueError(f"Unknown event type {event_type}")
+
+  def player_stats(self, stats: Dict[str, PlayerStats] = None) -> Dict[str, PlayerStats]:
+    """
+    Rebuilds each player's stats from the log, the same way `Round` and `LiarDiceGame` record them.
+    """
+    if stats is None:
+      stats = {}
+    names: List[str] = []
+    pending_call = None
+    for event in self.events():
+      event_type = event[0]
+      if event_type == EventType.GAME_START:
+        names = event[1]
+        for name in names:
+          if name not in stats:
+            stats[name] = PlayerStats()
+      elif event_type == EventType.BID:
+        stats[names[event[1]]].bids += 1
+      elif event_type == EventType.CALL:
+        _, challenger, bidder, out_of_turn, probability, forced = event
+        stats[names[bidder]].bids_called += 1
+        stats[names[challenger]].record_call(probability)
+        if out_of_turn:
+          stats[names[challenger]].calls_out_of_turn += 1
+        if forced:
+          stats[names[challenger]].forced_calls += 1
+        pending_call = (challenger, bidder)
+      elif event_type == EventType.RESOLUTION:
+        if pending_call is not None:
+          challenger, bidder = pending_call
+          if event[1] == bidder:
+            stats[names[bidder]].successful_bids += 1
+          else:
+            stats[names[challenger]].successful_calls += 1
+        pending_call = None
+      elif event_type == EventType.GAME_END:
+        for placing, (seat, dice_left) in enumerate(event[1]):
+          stats[names[seat]].record_game(placing, dice_left)
+    return stats
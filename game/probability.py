@@ -0,0 +1,86 @@
+from functools import lru_cache
+from math import comb, exp, lgamma, log
+from typing import Tuple
+
+# Tables for more unknown dice than this are summed in floating point (see `approximate_tail_table`)
+EXACT_TAIL_MAX_DICE = 200
+
+
+def tail_table(num_dice: int) -> Tuple[float, ...]:
+  """
+  Probability that at least k of `num_dice` unknown dice match a bid, for k = 0..num_dice.
+  A single unknown die matches (face_value or 1) with probability 1/3.
+  """
+  if num_dice > EXACT_TAIL_MAX_DICE:
+    return approximate_tail_table(num_dice)
+  return exact_tail_table(num_dice)
+
+
+@lru_cache(maxsize=None)
+def exact_tail_table(num_dice: int) -> Tuple[float, ...]:
+  """
+  The tail is summed with exact integers and only divided at the end,
+  so it's exact to the last bit, but takes longer the more dice there are.
+  Being exact, probabilities that are mathematically equal (like P(exactly 2 of 8) and P(exactly 3 of 8))
+  compare equal, so strategies that pick the best of several bids break those ties the same way every time,
+  rather than by whichever way floating point rounding happened to fall.
+  """
+  tails = [0.0] * (num_dice + 1)
+  denominator = 3 ** num_dice
+  total = 0
+  for k in range(num_dice, -1, -1):
+    total += comb(num_dice, k) * 2 ** (num_dice - k)
+    tails[k] = total / denominator
+  return tuple(tails)
+
+
+@lru_cache(maxsize=64)
+def approximate_tail_table(num_dice: int) -> Tuple[float, ...]:
+  """
+  For large tables: each term is worked out in log space with `lgamma`, so nothing overflows,
+  and the tail is summed from the top, so it's a sum of positive terms and can't go wrong
+  the way subtracting from 1 would. Relative error is around 1e-12 into the thousands of dice,
+  tails too small for a float come out as 0, and it takes time in proportion to the number of dice.
+  Tables change with every die lost, so only the most recent ones are kept.
+  """
+  tails = [0.0] * (num_dice + 1)
+  log_match, log_miss = log(1 / 3), log(2 / 3)
+  log_ways = lgamma(num_dice + 1)
+  total = 0.0
+  for k in range(num_dice, -1, -1):
+    total += exp(log_ways - lgamma(k + 1) - lgamma(num_dice - k + 1) + k * log_match + (num_dice - k) * log_miss)
+    tails[k] = min(total, 1.0)
+  return tuple(tails)
+
+
+def probability_at_least(needed: int, num_dice: int) -> float:
+  """
+  Probability that at least `needed` of `num_dice` unknown dice match a bid.
+  """
+  if needed <= 0:
+    return 1.0
+  if needed > num_dice:
+    return 0.0
+  return tail_table(num_dice)[needed]
+
+
+@lru_cache(maxsize=None)
+def binomial_pmf(num_dice: int) -> Tuple[float, ...]:
+  """
+  Probability that exactly k of `num_dice` unknown dice match a bid, for k = 0..num_dice.
+  """
+  denominator = 3 ** num_dice
+  return tuple(comb(num_dice, k) * 2 ** (num_dice - k) / denominator for k in range(0, num_dice + 1))
+
+
+def convolve(a: Tuple[float, ...], b: Tuple[float, ...]) -> Tuple[float, ...]:
+  """
+  Distribution of the sum of two independent counts, given the distribution of each.
+  """
+  result = [0.0] * (len(a) + len(b) - 1)
+  for i, p in enumerate(a):
+    if p == 0.0:
+      continue
+    for j, q in enumerate(b):
+      result[i + j] += p * q
+  return tuple(result)
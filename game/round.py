@@ -1,9 +1,148 @@
-import copy
-from math import comb
+import random
+from collections.abc import Sequence
+from itertools import islice
 from typing import List
 
 from utils.color_printer import *
-from player.player import Player
+from game.probability import probability_at_least, tail_table
+from player.player import Player, DICE_FACES
+
+
+class RoundHistory(Sequence):
+  """
+  The bids made so far in a round, as (player name, Bid) pairs, first bid first.
+  It's a read-only view of the first `length` bids in the round's own list, so handing it to a strategy
+  doesn't copy anything, and it doesn't change as later bids are added to the list.
+  It works like a tuple (slices of it are tuples), and is sent to other processes as one.
+  """
+  __slots__ = ("bids", "length")
+
+  def __init__(self, bids: List, length: int):
+    self.bids = bids
+    self.length = length
+
+  def __len__(self):
+    return self.length
+
+  def __getitem__(self, index):
+    if isinstance(index, slice):
+      return tuple(self.bids[i] for i in range(*index.indices(self.length)))
+    if index < 0:
+      index += self.length
+    if not 0 <= index < self.length:
+      raise IndexError("round history index out of range")
+    return self.bids[index]
+
+  def __iter__(self):
+    return islice(self.bids, self.length)
+
+  def __eq__(self, other):
+    if isinstance(other, (RoundHistory, tuple)):
+      return tuple(self) == tuple(other)
+    return NotImplemented
+
+  def __hash__(self):
+    return hash(tuple(self))
+
+  def __add__(self, other):
+    return tuple(self) + tuple(other)
+
+  def __radd__(self, other):
+    return tuple(other) + tuple(self)
+
+  def __reduce__(self):
+    return tuple, (tuple(self),)
+
+  def __repr__(self):
+    return repr(tuple(self))
+
+
+class ProbabilityOfTruth:
+  """
+  The probability that a bid is true from a player's point of view, worked out the first time it's used
+  (if it ever is, or when the player calls).
+  It compares and does arithmetic like a float, and `float(probability)` is the number itself,
+  so a strategy that never looks at it doesn't pay for it.
+  """
+  __slots__ = ("round", "player", "bid", "value")
+
+  def __init__(self, round, player: Player, bid):
+    self.round = round
+    self.player = player
+    self.bid = bid
+    self.value = None
+
+  def __float__(self):
+    if self.value is None:
+      self.value = self.round.bid_probability(self.player, self.bid)
+    return self.value
+
+  def __reduce__(self):
+    # sent to other processes (e.g. sandboxed strategies) as a plain float
+    return float, (float(self),)
+
+  def __repr__(self):
+    return repr(float(self))
+
+  def __format__(self, format_spec):
+    return format(float(self), format_spec)
+
+  def __hash__(self):
+    return hash(float(self))
+
+  def __bool__(self):
+    return float(self) != 0.0
+
+  def __eq__(self, other):
+    return float(self) == other
+
+  def __ne__(self, other):
+    return float(self) != other
+
+  def __lt__(self, other):
+    return float(self) < other
+
+  def __le__(self, other):
+    return float(self) <= other
+
+  def __gt__(self, other):
+    return float(self) > other
+
+  def __ge__(self, other):
+    return float(self) >= other
+
+  def __add__(self, other):
+    return float(self) + other
+
+  def __radd__(self, other):
+    return other + float(self)
+
+  def __sub__(self, other):
+    return float(self) - other
+
+  def __rsub__(self, other):
+    return other - float(self)
+
+  def __mul__(self, other):
+    return float(self) * other
+
+  def __rmul__(self, other):
+    return other * float(self)
+
+  def __truediv__(self, other):
+    return float(self) / other
+
+  def __rtruediv__(self, other):
+    return other / float(self)
+
+  def __neg__(self):
+    return -float(self)
+
+  def __abs__(self):
+    return abs(float(self))
+
+  def __round__(self, ndigits=None):
+    return round(float(self), ndigits)
 
 
 class Round:
@@ -11,16 +150,31 @@ class Round:
   A single round of Liar's dice.
   A round lasts from the first bid until a player is challenged.
   """
-  def __init__(self, players: List[Player], verbose: bool):
+  def __init__(self, players: List[Player], verbose: bool, rng=random, recorder=None, timer=None):
     self.players = players
+    self.rng = rng
+    self.recorder = recorder
+    self.timer = timer
     self.active_player_index = 0
-    self.history = []  # list of (player_name, Bid)
+    # (player_name, Bid) of every bid so far. Only the round adds to `bids`, strategies get `history`, a view of it
+    self.bids = []
+    self.history = RoundHistory(self.bids, 0)
     self.current_bid = None
     self.verbose = verbose
-    self.dice_counts = []
-    
-    for p in self.players:
-      self.dice_counts.append((p.name, p.num_dice))
+    # Strategies get tuples of the round state, so they can read it but can't tamper with it
+    self.dice_counts = tuple((p.name, p.num_dice) for p in self.players)
+    self.total_dice = sum(p.num_dice for p in self.players)
+    # Filled in when the dice are rolled: how many dice match each face (including wilds),
+    # across the table and for each player, indexed by face value
+    self.matching_dice = [0] * 7
+    self.player_matching_dice = {}
+    # The same counts for each player in turn order, and the tail table for the dice each player can't see,
+    # so working out a probability for each player after a bid is a couple of lookups
+    self.seat_matching_dice = []
+    self.seat_tails = []
+    # Strategies that work out their own probabilities get a ProbabilityOfTruth instead of a float,
+    # so it isn't worked out for them after every bid
+    self.reads_probability = [getattr(p.strategy, "READS_PROBABILITY_OF_TRUTH", True) for p in self.players]
 
   @property
   def active_player(self):
@@ -44,20 +198,23 @@ class Round:
     Calculate how many turns until `player`'s turn comes up again 
     in a cyclic order of alive players, starting from active player.
     """
-    if self.active_player is None:
+    return self.turns_until_seat(self.players.index(player))
+
+  def turns_until_seat(self, player_index: int):
+    """
+    Same as `turns_until_player_turn`, for the player at `player_index` in turn order,
+    without having to look for them around the table.
+    """
+    if self.active_player_index is None:
       return 0
 
-    if self.active_player == player:
+    if player_index == self.active_player_index:
       # If asking about active player, turns until their next turn is 
       # the number of other players.
       return len(self.players) - 1
 
-    # Otherwise, find player's position relative to active_player in turn order
-    player_index = self.players.index(player)
-    if player_index > self.active_player_index:
-      return player_index - self.active_player_index - 1
-    
-    return len(self.players) - (self.active_player_index - player_index) - 1
+    # Otherwise, their position relative to active_player in turn order
+    return (player_index - self.active_player_index - 1) % len(self.players)
 
   def count_matching_dice(self, dice: List[int], face_value: int) -> int:
     """
@@ -65,50 +222,80 @@ class Round:
     """
     return sum(1 for d in dice if d == face_value or d == 1)
 
+  @staticmethod
+  def matching_by_face(dice: List[int]) -> List[int]:
+    """
+    How many of the dice match each face value (including wilds), indexed by face value.
+    """
+    faces = [0] * 7
+    for d in dice:
+      faces[d] += 1
+    return [faces[face] + faces[1] for face in range(0, 7)]
+
+  def known_matching_dice(self, player: Player, face_value: int) -> int:
+    matching = self.player_matching_dice.get(player)
+    if matching is None:
+      return self.count_matching_dice(player.dice, face_value)
+    return matching[face_value]
+
   def compute_probability(self, perspective_player) -> float:
     """
     Compute probability that the current bid is true from the perspective of a given player.
-    If perspective_player is None, use the active player of the round.
     """
-    if self.current_bid is None or perspective_player is None:
-      return 1.0  # If no bid or no perspective player, trivial probability
+    return self.bid_probability(perspective_player, self.current_bid)
 
-    face_value = self.current_bid.face_value
-    required = self.current_bid.number_of_dice
+  def probability_of_truth(self, player_index: int):
+    """
+    The probability of the current bid to pass to a player's `challenge_bid`.
+    """
+    player = self.players[player_index]
+    if self.reads_probability[player_index]:
+      return self.seat_probability(player_index, self.current_bid)
+    return ProbabilityOfTruth(self, player, self.current_bid)
 
-    # Total dice in play
-    total_dice = sum(p.num_dice for p in self.players)
+  def seat_probability(self, player_index: int, bid) -> float:
+    """
+    Same as `bid_probability` for the player at `player_index`, once the dice are rolled.
+    """
+    needed = bid.number_of_dice - self.seat_matching_dice[player_index][bid.face_value]
+    if needed <= 0:
+      return 1.0
+    tails = self.seat_tails[player_index]
+    return tails[needed] if needed < len(tails) else 0.0
+
+  def bid_probability(self, perspective_player, bid) -> float:
+    if bid is None or perspective_player is None:
+      return 1.0  # If no bid or no perspective player, trivial probability
+
+    face_value = bid.face_value
+    required = bid.number_of_dice
 
     # Known count from perspective player's dice
-    known_count = sum(1 for d in perspective_player.dice if d == face_value or d == 1)
+    known_count = self.known_matching_dice(perspective_player, face_value)
 
     # Unknown dice
-    unknown_count = total_dice - len(perspective_player.dice)
+    unknown_count = self.total_dice - len(perspective_player.dice)
 
     if known_count >= required:
       return 1.0
 
     needed = required - known_count
 
-    # Probability that a single unknown die matches (face_value or 1): 1/3
-    p_match = 1/3
-
-    # Compute probability: at least needed out of unknown_count match
-    prob = 0.0
-    for k in range(needed, unknown_count + 1):
-      prob += comb(unknown_count, k) * (p_match**k) * ((1 - p_match)**(unknown_count - k))
+    # Probability that at least needed out of unknown_count match
+    return probability_at_least(needed, unknown_count)
 
-    return prob
-
-  def resolve_call(self, all_dice, bidder, challenger, out_of_turn_call, probability) -> Player:
+  def resolve_call(self, bidder, challenger, out_of_turn_call, probability, forced=False) -> Player:
     if self.verbose:
       print(f"{challenger.name} {ColorPrinter.MAGENTA_TEXT}calls{ColorPrinter.RESET_TEXT}.")
       ColorPrinter.cprint(Color.CYAN, "-------------------------")
+    probability = float(probability)
     bidder.stats.bids_called += 1
-    challenger.stats.calls.append(probability)
+    challenger.stats.record_call(probability)
     if out_of_turn_call:
       challenger.stats.calls_out_of_turn += 1
-    matching_dice = self.count_matching_dice(all_dice, self.current_bid.face_value)
+    if forced:
+      challenger.stats.forced_calls += 1
+    matching_dice = self.matching_dice[self.current_bid.face_value]
     loser = None
     winner = None
     color_code = ""
@@ -124,84 +311,184 @@ class Round:
       color_code = ColorPrinter.RED_TEXT
     if self.verbose:
       print(f"Total matching dice: {color_code}{matching_dice}{ColorPrinter.RESET_TEXT}. {loser.name} loses a die.")
+    if self.recorder is not None:
+      self.recorder.call(challenger, bidder, out_of_turn_call, probability, forced)
+      self.recorder.resolution(winner, loser, matching_dice)
+    return winner, loser
+
+  def time_out(self, loser, winner):
+    """
+    Ends the round with `loser` losing a die for going over their time budget.
+    """
+    if self.verbose:
+      print(f"{loser.name} {ColorPrinter.RED_TEXT}ran out of time{ColorPrinter.RESET_TEXT} and loses a die.")
+    if self.recorder is not None:
+      self.recorder.resolution(winner, loser)
     return winner, loser
 
   def bid_is_valid(self, bid) -> bool:
-    total_dice = sum(p.num_dice for p in self.players)
-    if bid.number_of_dice > total_dice or bid.face_value <= 1 or bid.face_value > 6:
+    if bid.number_of_dice > self.total_dice or bid.face_value <= 1 or bid.face_value > 6:
       return False
-    return bid.number_of_dice <= total_dice and bid.is_higher_than(self.current_bid)
+    return bid.is_higher_than(self.current_bid)
+
+  def roll_dice(self):
+    """
+    Rolls every player's dice with a single draw from the round's random number generator,
+    and counts the matching dice for each face once, so the rest of the round doesn't need to.
+    """
+    rolls = self.rng.choices(DICE_FACES, k=self.total_dice)
+    self.hand_out_dice(rolls)
+    return rolls
+
+  def hand_out_dice(self, rolls: List[int]):
+    """
+    Gives each player their share of `rolls`, in turn order, and counts the matching dice.
+    """
+    start = 0
+    self.player_matching_dice = {}
+    self.seat_matching_dice = []
+    self.seat_tails = []
+    for p in self.players:
+      p.dice = tuple(rolls[start:start + p.num_dice])
+      start += p.num_dice
+      matching = Round.matching_by_face(p.dice)
+      self.player_matching_dice[p] = matching
+      self.seat_matching_dice.append(matching)
+      self.seat_tails.append(tail_table(self.total_dice - p.num_dice))
+    self.matching_dice = Round.matching_by_face(rolls)
 
   def reset(self):
     self.current_bid = None
-    self.history = []
+    # a new list, so views handed out before stay as they were
+    self.bids = []
+    self.history = RoundHistory(self.bids, 0)
 
-  def play(self):
+  def add_bid(self, player: Player, bid):
+    self.bids.append((player.name, bid))
+    self.history = RoundHistory(self.bids, len(self.bids))
+
+  def start_round(self) -> bool:
+    """
+    Clears the bids and rolls the dice. False if there's nobody to play the round.
+    """
     self.reset()
     if self.active_player is None or len(self.players) == 0 or self.active_player_index is None:
       # Shouldn't get here...
+      return False
+    self.roll_dice()
+    return True
+
+  def record_roll(self, player: Player):
+    if self.recorder is not None:
+      self.recorder.roll(player)
+
+  def show_dice(self):
+    if self.verbose:
+      for p in self.players:
+        print(f"{p.name}'s {ColorPrinter.BLACK_TEXT}dice:{ColorPrinter.RESET_TEXT} {p.dice}")
+      ColorPrinter.cprint(Color.CYAN, "-------------------------")
+
+  def make_bid_args(self):
+    """
+    The arguments to the active player's `make_bid`.
+    """
+    return (
+      self.history,
+      self.current_bid,
+      self.dice_counts,
+      (len(self.players) - 1),
+      self.active_player.dice,
+    )
+
+  def take_bid(self, bid, overrun=False):
+    """
+    Adds the active player's bid to the round, or, if it isn't valid (running out of time counts as an invalid bid),
+    ends the round and returns (winner, loser).
+    """
+    # if this is the first bid of the game, and the player makes an invalid bid, they lose a die and the round is over
+    if self.current_bid is None and (overrun or not self.bid_is_valid(bid)):
+      next_player = self.players[self.next_player_index(self.active_player_index)]
+      if self.recorder is not None:
+        self.recorder.resolution(next_player, self.active_player)
+      return next_player, self.active_player
+
+    # if the new bid isn't valid, force them to call the last bid
+    if overrun or not self.bid_is_valid(bid):
+      prev_player = self.players[self.prev_player_index(self.active_player_index)]
+      return self.resolve_call(prev_player, self.active_player, False, self.compute_probability(self.active_player), forced=True)
+
+    self.add_bid(self.active_player, bid)
+    self.current_bid = bid
+    self.active_player.stats.bids += 1
+    if self.recorder is not None:
+      self.recorder.bid(self.active_player, bid)
+    if self.verbose:
+      print(f"{self.active_player.name} {ColorPrinter.BLACK_TEXT}bids{ColorPrinter.RESET_TEXT} {bid}{ColorPrinter.BLACK_TEXT}.{ColorPrinter.RESET_TEXT}")
+    return None
+
+  def challengers(self):
+    """
+    Goes round the table from the player after the bidder, giving (player, out_of_turn, probability, args)
+    for each player who can challenge the current bid, where args are the arguments to their `challenge_bid`.
+    """
+    player_to_call_index = self.next_player_index(self.active_player_index)
+    for n in range(0, len(self.players) - 1):
+      player_to_call = self.players[player_to_call_index]
+      out_of_turn = n > 0
+      probability = self.probability_of_truth(player_to_call_index)
+      args = (
+        self.history,
+        self.current_bid,
+        self.dice_counts,
+        probability,
+        n,  # turns until their turn, the same as turns_until_seat(player_to_call_index)
+        player_to_call.dice,
+        out_of_turn
+      )
+      yield player_to_call, out_of_turn, probability, args
+      player_to_call_index = (player_to_call_index + 1) % len(self.players)
+
+  def play(self):
+    """
+    Plays the round and returns (winner, loser). `AsyncRound.play` is the same with the strategies awaited,
+    so anything that isn't a call to a strategy belongs in the helpers both of them use.
+    """
+    if not self.start_round():
       return None
 
-    # Roll dice
-    all_dice = []
     for p in self.players:
-      p.roll_dice()
-      all_dice.extend(p.dice)
+      self.record_roll(p)
       if hasattr(p.strategy, 'prepare_for_new_round'):
-        p.strategy.prepare_for_new_round(copy.deepcopy(self.dice_counts), copy.deepcopy(p.dice))
-      if self.verbose:
-        print(f"{p.name}'s {ColorPrinter.BLACK_TEXT}dice:{ColorPrinter.RESET_TEXT} {p.dice}")
-    
-    if self.verbose:
-      ColorPrinter.cprint(Color.CYAN, "-------------------------")
+        if self.timer is None:
+          p.strategy.prepare_for_new_round(self.dice_counts, p.dice)
+        else:
+          _, overrun = self.timer.call(p, "prepare_for_new_round", p.strategy.prepare_for_new_round, (self.dice_counts, p.dice))
+          if overrun:
+            return self.time_out(p, self.players[self.next_player_index(self.players.index(p))])
+    self.show_dice()
 
-    loser = None
-    while loser is None:
+    while True:
       # get the next bid
-      bid = self.active_player.strategy.make_bid(
-        copy.deepcopy(self.history),
-        copy.deepcopy(self.current_bid),
-        copy.deepcopy(self.dice_counts),
-        (len(self.players) - 1),
-        copy.deepcopy(self.active_player.dice),
-      )
-      
-      # if this is the first bid of the game, and the player makes an invalid bid, they lose a die and the round is over
-      if self.current_bid is None and not self.bid_is_valid(bid):
-        next_player_index = self.next_player_index(self.active_player_index)
-        next_player = self.players[next_player_index]
-        return next_player, self.active_player
-
-      # if the new bid isn't valid, force them to call the last bid
-      if not self.bid_is_valid(bid):
-        prev_player = self.players[self.prev_player_index(self.active_player_index)]
-        return self.resolve_call(all_dice, prev_player, self.active_player, False, self.compute_probability(self.active_player))
-
-      self.history.append((self.active_player.name, bid))
-      self.current_bid = bid
-      self.active_player.stats.bids += 1
-      if self.verbose:
-        print(f"{self.active_player.name} {ColorPrinter.BLACK_TEXT}bids{ColorPrinter.RESET_TEXT} {bid}{ColorPrinter.BLACK_TEXT}.{ColorPrinter.RESET_TEXT}")
+      args = self.make_bid_args()
+      overrun = False
+      if self.timer is None:
+        bid = self.active_player.strategy.make_bid(*args)
+      else:
+        bid, overrun = self.timer.call(self.active_player, "make_bid", self.active_player.strategy.make_bid, args)
+      result = self.take_bid(bid, overrun)
+      if result is not None:
+        return result
 
       # otherwise, check to see if any players will challenge it
-      player_to_call_index = self.next_player_index(self.active_player_index)
-      for n in range(0, len(self.players) - 1):
-        player_to_call = self.players[player_to_call_index]
-        out_of_turn = n > 0
-        probability = self.compute_probability(player_to_call)
-        if player_to_call.strategy.challenge_bid(
-          copy.deepcopy(self.history),
-          copy.deepcopy(self.current_bid),
-          copy.deepcopy(self.dice_counts),
-          probability,
-          self.turns_until_player_turn(player_to_call),
-          copy.deepcopy(player_to_call.dice),
-          out_of_turn
-        ):
-          return self.resolve_call(all_dice, self.active_player, player_to_call, out_of_turn, probability)
-
-        player_to_call_index = (player_to_call_index + 1) % len(self.players)
-
-      # no one challenged it, move on to the next round
-      self.current_bid = bid
+      for player_to_call, out_of_turn, probability, args in self.challengers():
+        if self.timer is None:
+          challenge = player_to_call.strategy.challenge_bid(*args)
+        else:
+          challenge, overrun = self.timer.call(player_to_call, "challenge_bid", player_to_call.strategy.challenge_bid, args)
+          if overrun:
+            return self.time_out(player_to_call, self.active_player)
+        if challenge:
+          return self.resolve_call(self.active_player, player_to_call, out_of_turn, probability)
+
+      # no one challenged it, move on to the next player
       self.active_player_index = self.next_player_index(self.active_player_index)
@@ -0,0 +1,49 @@
+from typing import Iterator, List
+
+from player.player import Player
+
+
+class Seating:
+  """
+  The players still in a game, around the table in seat order.
+  Seats are a ring of indexes into the seating order, so finding a player's seat, taking a player
+  out, and going round the table from any seat don't depend on how many players there are,
+  which matters at tables of hundreds of players.
+  """
+  def __init__(self, players: List[Player]):
+    self.players = list(players)
+    self.seats = {p: seat for seat, p in enumerate(self.players)}
+    num_seats = len(self.players)
+    self.next_seat = [(seat + 1) % num_seats for seat in range(0, num_seats)]
+    self.prev_seat = [(seat - 1) % num_seats for seat in range(0, num_seats)]
+    self.first_seat = 0
+    self.num_players = num_seats
+
+  def __len__(self):
+    return self.num_players
+
+  def __iter__(self) -> Iterator[Player]:
+    return iter(self.in_turn_order(self.first_seat))
+
+  def seat(self, player: Player) -> int:
+    return self.seats[player]
+
+  def remove(self, player: Player):
+    seat = self.seats.pop(player)
+    next_seat, prev_seat = self.next_seat[seat], self.prev_seat[seat]
+    self.next_seat[prev_seat] = next_seat
+    self.prev_seat[next_seat] = prev_seat
+    if seat == self.first_seat:
+      self.first_seat = next_seat
+    self.num_players -= 1
+
+  def in_turn_order(self, starting_seat: int) -> List[Player]:
+    """
+    The players still in the game, going round the table from `starting_seat`.
+    """
+    players = []
+    seat = starting_seat
+    for _ in range(0, self.num_players):
+      players.append(self.players[seat])
+      seat = self.next_seat[seat]
+    return players
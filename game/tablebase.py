@@ -0,0 +1,111 @@
+import bisect
+import itertools
+import mmap
+import struct
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+from game.bid import Bid
+
+# A tablebase file is a header, the value of every heads-up game up to MAX_DICE v MAX_DICE,
+# then a strategy block for each round (starter dice, responder dice, actor), laid out in that order.
+# A strategy block is indexed [last bid][actor's roll][action]. The last bid is 0 before anyone has bid,
+# and action 0 is a call. Each entry is the cumulative probability of the actions up to it, out of CUMULATIVE_SCALE.
+MAGIC = b"LDTB"
+VERSION = 1
+HEADER = struct.Struct("<4sBB")  # magic, version, max dice
+VALUE = struct.Struct("<d")
+CUMULATIVE_SCALE = 0xFFFF
+CALL = 0
+
+
+def num_bids(total_dice: int) -> int:
+  return 5 * total_dice
+
+
+def bid_index(bid: Bid) -> int:
+  """
+  Bids are numbered from 1, in order of number of dice then face value, so a higher bid always
+  has a higher index (but not every bid with a higher index is a higher bid).
+  """
+  return (bid.number_of_dice - 1) * 5 + bid.face_value - 1
+
+
+def index_bid(index: int) -> Bid:
+  return Bid((index - 1) // 5 + 1, (index - 1) % 5 + 2)
+
+
+@lru_cache(maxsize=None)
+def rolls(num_dice: int) -> Tuple[Tuple[int, ...], ...]:
+  """
+  Every distinct roll of `num_dice` dice, as sorted tuples. A roll's position here is its index in the table.
+  """
+  return tuple(itertools.combinations_with_replacement(range(1, 7), num_dice))
+
+
+@lru_cache(maxsize=None)
+def roll_indexes(num_dice: int) -> Dict[Tuple[int, ...], int]:
+  return {roll: i for i, roll in enumerate(rolls(num_dice))}
+
+
+def block_shape(starter_dice: int, responder_dice: int, actor: int) -> Tuple[int, int, int]:
+  total_dice = starter_dice + responder_dice
+  actor_dice = starter_dice if actor == 0 else responder_dice
+  return num_bids(total_dice) + 1, len(rolls(actor_dice)), num_bids(total_dice) + 1
+
+
+def block_order(max_dice: int) -> List[Tuple[int, int, int]]:
+  return [(a, b, actor) for a in range(1, max_dice + 1) for b in range(1, max_dice + 1) for actor in (0, 1)]
+
+
+class Tablebase:
+  """
+  Reads a tablebase written by `tablebase_solver.py` through a memory map, so looking up a decision
+  only touches the few bytes it needs.
+
+  Players are the round's starter (actor 0, who makes the first bid) and the responder (actor 1).
+  """
+  def __init__(self, path: str):
+    self.path = path
+    with open(path, "rb") as f:
+      self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, version, self.max_dice = HEADER.unpack_from(self.data, 0)
+    if magic != MAGIC or version != VERSION:
+      raise ValueError(f"{path} isn't a version {VERSION} tablebase")
+
+    offset = HEADER.size + VALUE.size * (self.max_dice + 1) ** 2
+    self.blocks = {}  # (starter dice, responder dice, actor) -> (offset, roll count, action count)
+    for key in block_order(self.max_dice):
+      nodes, num_rolls, num_actions = block_shape(*key)
+      self.blocks[key] = (offset, num_rolls, num_actions)
+      offset += nodes * num_rolls * num_actions * 2
+
+  def covers(self, starter_dice: int, responder_dice: int) -> bool:
+    return 0 < starter_dice <= self.max_dice and 0 < responder_dice <= self.max_dice
+
+  def value(self, starter_dice: int, responder_dice: int) -> float:
+    """
+    The probability the round's starter goes on to win the game, when both sides play the table.
+    """
+    index = starter_dice * (self.max_dice + 1) + responder_dice
+    return VALUE.unpack_from(self.data, HEADER.size + index * VALUE.size)[0]
+
+  def cumulative(self, starter_dice: int, responder_dice: int, actor: int, current_bid: Bid, dice) -> Tuple[int, ...]:
+    offset, num_rolls, num_actions = self.blocks[(starter_dice, responder_dice, actor)]
+    node = 0 if current_bid is None else bid_index(current_bid)
+    roll = roll_indexes(len(dice))[tuple(sorted(dice))]
+    return struct.unpack_from(f"<{num_actions}H", self.data, offset + (node * num_rolls + roll) * num_actions * 2)
+
+  def choose(self, starter_dice: int, responder_dice: int, actor: int, current_bid: Bid, dice, u: float):
+    """
+    Picks the actor's decision with a uniform random number `u` in [0, 1).
+    Returns None to call `current_bid`, or the bid to raise it to.
+    """
+    cumulative = self.cumulative(starter_dice, responder_dice, actor, current_bid, dice)
+    action = bisect.bisect_right(cumulative, int(u * CUMULATIVE_SCALE))
+    if action == CALL:
+      return None
+    return index_bid(action)
+
+  def close(self):
+    self.data.close()
@@ -5,70 +5,107 @@ from typing import List
 from utils.color_printer import ColorPrinter, Color
 from player.player import Player
 from game.round import Round
+from game.seating import Seating
 from player.strategy.strategy import Strategy
 from player.strategy.jeff.bad_strategy import BadStrategy
 
 
 class LiarDiceGame:
-  def __init__(self, players: List[Player], verbose=False):
+  def __init__(self, players: List[Player], verbose=False, rng=None, recorder=None, timer=None, shuffle=True, reuse_players=False):
     self.players = players
+    # Players are seated in a random order, unless the seating has already been decided
+    self.shuffle = shuffle
+    # Plays with the players themselves, reset for the game, instead of copies of them.
+    # Much cheaper, but only one game at a time can use the same players.
+    self.reuse_players = reuse_players
+    self.recorder = recorder
+    self.timer = timer
+    # Everything random in the game comes from here, so a game can be replayed from its seed
+    self.rng = rng if rng is not None else random.Random()
     self.round_number = 0
+    self.bids_per_round = []
     self.verbose = verbose
 
-  def get_active_players(self, starting_player, player_list):
-    """
-    Gets the list of players for the next round.
-    Organized in turn order, beginning with the player to start the round
-    """
-    active_players = []
-    for i in range(0, len(player_list)):
-      idx = (i + starting_player) % len(player_list)
-      if player_list[idx].is_alive:
-        active_players.append(player_list[idx])
-    return active_players
-
   def shuffle_players(self):
-    shuffled_list = copy.deepcopy(self.players)
-    random.shuffle(shuffled_list)
-    return shuffled_list
+    if self.reuse_players:
+      for player in self.players:
+        player.reset()
+      players = self.players
+    else:
+      players = copy.deepcopy(self.players)
+    if not self.shuffle:
+      return list(players)
+    # shuffling seat numbers draws the same numbers as shuffling the players
+    seats = list(range(0, len(players)))
+    self.rng.shuffle(seats)
+    return [players[seat] for seat in seats]
 
-  def play_game(self):
-    starting_player = 0
+  def start_game(self):
+    """
+    Seats the players for a new game, and returns them in seating order.
+    """
     current_players = self.shuffle_players()
-    standings = []
+    if self.recorder is not None:
+      self.recorder.game_start(current_players)
+    if self.timer is not None:
+      self.timer.new_game()
+    return current_players
 
-    while len([p for p in current_players if p.is_alive]) > 1:
-      self.round_number += 1
+  def new_round(self, starting_seat, seating):
+    """
+    The next round, with the players still in the game in turn order, beginning with the one in `starting_seat`.
+    """
+    self.round_number += 1
+    if self.verbose:
+      print(f"\n\n----- {ColorPrinter.BLUE_TEXT}Round {self.round_number}{ColorPrinter.RESET_TEXT} -----")
+    return Round(seating.in_turn_order(starting_seat), self.verbose, self.rng, self.recorder, self.timer)
+
+  def end_round(self, seating, standings, round_winner, round_loser):
+    """
+    Takes a die from the round's loser, eliminating them if that was their last.
+    Returns the seat of the player who starts the next round.
+    """
+    round_loser.num_dice -= 1
+    if not round_loser.is_alive:
+      seating.remove(round_loser)
+      standings.insert(0, round_loser)
+      if self.recorder is not None:
+        self.recorder.elimination(round_loser, len(seating))
       if self.verbose:
-        print(f"\n\n----- {ColorPrinter.BLUE_TEXT}Round {self.round_number}{ColorPrinter.RESET_TEXT} -----")
-      round = Round(self.get_active_players(starting_player, current_players), self.verbose)
-      round_winner, round_loser = round.play()
-      round_loser.num_dice -= 1
-      if not round_loser.is_alive:
-        current_players.remove(round_loser)
-        standings.insert(0, round_loser)
-        if self.verbose:
-          msg = "{} has been eliminated.".format(round_loser.name)
-          ColorPrinter.cprint(Color.YELLOW, msg)
+        msg = "{} has been eliminated.".format(round_loser.name)
+        ColorPrinter.cprint(Color.YELLOW, msg)
 
-      # start next round with whoever won the last round
-      starting_player = current_players.index(round_winner)
+    # start next round with whoever won the last round
+    return seating.seat(round_winner)
 
+  def end_game(self, seating, standings):
     # The last one standing won
-    if len(current_players) != 1:
+    if len(seating) != 1:
       ColorPrinter.cprint(Color.RED, "********* Unknown Error: Unable to determine winner! **********")
     else:
-      standings.insert(0, current_players[0])
+      standings.insert(0, next(iter(seating)))
+      if self.recorder is not None:
+        self.recorder.game_end(standings)
 
       # update all the player stats with their results
       for placing, player in enumerate(standings):
-        player.stats.performance.append(placing)
-        player.stats.dice_left.append(player.num_dice)
+        player.stats.record_game(placing, player.num_dice)
 
       if self.verbose:
         self.print_standings(standings)
       return standings
 
+  def play_game(self):
+    starting_seat = 0
+    seating = Seating(self.start_game())
+    standings = []
+    while len(seating) > 1:
+      current_round = self.new_round(starting_seat, seating)
+      round_winner, round_loser = current_round.play()
+      self.bids_per_round.append(len(current_round.history))
+      starting_seat = self.end_round(seating, standings, round_winner, round_loser)
+    return self.end_game(seating, standings)
+
   def print_standings(self, standings):
     print(f"\n\n---------- {ColorPrinter.CYAN_TEXT}Game Over!{ColorPrinter.RESET_TEXT} ----------")
     placement = 1
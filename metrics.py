@@ -0,0 +1,300 @@
+import json
+import os
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+
+
+class Histogram:
+  """
+  Counts of values in fixed buckets, each counting the values up to its upper bound (the last one has no bound).
+  """
+  def __init__(self, bounds: Tuple[float, ...]):
+    self.bounds = bounds
+    self.counts = [0] * (len(bounds) + 1)
+    self.count = 0
+    self.sum = 0.0
+
+  def record(self, value: float):
+    bucket = 0
+    while bucket < len(self.bounds) and value > self.bounds[bucket]:
+      bucket += 1
+    self.counts[bucket] += 1
+    self.count += 1
+    self.sum += value
+
+  def update(self, other: 'Histogram'):
+    for bucket, count in enumerate(other.counts):
+      self.counts[bucket] += count
+    self.count += other.count
+    self.sum += other.sum
+
+  def cumulative(self) -> List[Tuple[str, int]]:
+    """
+    (upper bound, values up to it) for every bucket, the way Prometheus lays out a histogram.
+    """
+    buckets = []
+    seen = 0
+    for bound, count in zip(list(self.bounds) + ["+Inf"], self.counts):
+      seen += count
+      buckets.append((str(bound), seen))
+    return buckets
+
+
+class GameMetrics:
+  """
+  Totals over a batch of finished games. Only filled in from games once they're over,
+  so none of it is counted while a round is being played.
+  """
+  ROUNDS_PER_GAME_BUCKETS = (5, 10, 15, 20, 25, 30, 40, 50, 75, 100)
+  BIDS_PER_ROUND_BUCKETS = (0, 1, 2, 3, 4, 5, 6, 8, 10, 15, 20, 30)
+
+  def __init__(self):
+    self.games = 0
+    self.rounds = 0
+    self.bids = 0
+    self.calls = 0
+    self.forced_calls = 0
+    self.calls_out_of_turn = 0
+    self.rounds_per_game = Histogram(GameMetrics.ROUNDS_PER_GAME_BUCKETS)
+    self.bids_per_round = Histogram(GameMetrics.BIDS_PER_ROUND_BUCKETS)
+    self.strategies = {}  # strategy class name -> [games played, games won]
+
+  def record_game(self, game, standings):
+    self.games += 1
+    self.rounds += game.round_number
+    self.rounds_per_game.record(game.round_number)
+    for bids in game.bids_per_round:
+      self.bids_per_round.record(bids)
+    for placing, player in enumerate(standings):
+      stats = player.stats
+      self.bids += stats.bids
+      self.calls += stats.num_calls
+      self.forced_calls += stats.forced_calls
+      self.calls_out_of_turn += stats.calls_out_of_turn
+      # strategies that stand in for another one (sandboxed or adapted to async) say which they play as
+      strategy = getattr(player.strategy, "strategy_class", type(player.strategy)).__name__
+      if strategy not in self.strategies:
+        self.strategies[strategy] = [0, 0]
+      self.strategies[strategy][0] += 1
+      if placing == 0:
+        self.strategies[strategy][1] += 1
+
+  def update(self, other: 'GameMetrics'):
+    self.games += other.games
+    self.rounds += other.rounds
+    self.bids += other.bids
+    self.calls += other.calls
+    self.forced_calls += other.forced_calls
+    self.calls_out_of_turn += other.calls_out_of_turn
+    self.rounds_per_game.update(other.rounds_per_game)
+    self.bids_per_round.update(other.bids_per_round)
+    for strategy, (games, wins) in other.strategies.items():
+      if strategy not in self.strategies:
+        self.strategies[strategy] = [0, 0]
+      self.strategies[strategy][0] += games
+      self.strategies[strategy][1] += wins
+
+
+class MetricsBatch:
+  """
+  Collects metrics where the games are played, and hands them over to the `Metrics` every `interval` seconds,
+  so the games never wait on anything but a clock check.
+  """
+  def __init__(self, sink, interval: float):
+    self.sink = sink
+    self.interval = interval
+    self.metrics = GameMetrics()
+    self.next_flush = time.monotonic() + interval
+
+  def record_game(self, game, standings):
+    self.metrics.record_game(game, standings)
+    if time.monotonic() >= self.next_flush:
+      self.flush()
+
+  def flush(self):
+    if self.metrics.games > 0:
+      self.sink.put(self.metrics)
+      self.metrics = GameMetrics()
+    self.next_flush = time.monotonic() + self.interval
+
+
+class Metrics:
+  """
+  Live metrics of a running tournament, written to `path` every `interval` seconds, and served on
+  http://127.0.0.1:`port`/metrics if a port is given. Snapshots are in the Prometheus text format,
+  or JSON if the path ends in .json (`/metrics.json` serves JSON either way).
+
+  Games hand their metrics over in batches (see `MetricsBatch`), through a queue that a background
+  thread drains, so workers in other processes can report too.
+  """
+  def __init__(self, path=None, port=None, interval=5.0):
+    self.path = path
+    self.port = port
+    self.interval = interval
+    self.queue = None
+    self.totals = GameMetrics()
+    self.started = None
+    self.last_snapshot = (0.0, 0)  # (time, games) when the last snapshot was taken
+    self.games_per_second = 0.0
+    # The latest snapshots, swapped in whole so the HTTP server never sees one half written
+    self.text = ""
+    self.json = "{}"
+    self.thread = None
+    self.server = None
+    self.manager = None
+
+  def __getstate__(self):
+    # Only the queue goes to worker processes
+    return {"path": None, "port": None, "interval": self.interval, "queue": self.queue}
+
+  def __setstate__(self, state):
+    self.__init__(state["path"], state["port"], state["interval"])
+    self.queue = state["queue"]
+
+  def batch(self) -> MetricsBatch:
+    return MetricsBatch(self.queue, self.interval)
+
+  def start(self, processes=False):
+    """
+    Starts collecting metrics. With `processes`, the queue can be shared with worker processes.
+    """
+    if processes:
+      from multiprocessing import Manager
+      self.manager = Manager()
+      self.queue = self.manager.Queue()
+    else:
+      self.queue = queue.SimpleQueue()
+    self.started = time.monotonic()
+    self.last_snapshot = (self.started, 0)
+    self.snapshot()
+    if self.port is not None:
+      self.serve()
+    self.thread = threading.Thread(target=self.collect, daemon=True)
+    self.thread.start()
+
+  def collect(self):
+    next_snapshot = time.monotonic() + self.interval
+    while True:
+      try:
+        batch = self.queue.get(timeout=max(next_snapshot - time.monotonic(), 0.0))
+      except queue.Empty:
+        batch = False
+      if batch is None:
+        break
+      if batch:
+        self.totals.update(batch)
+      if time.monotonic() >= next_snapshot:
+        self.snapshot()
+        next_snapshot = time.monotonic() + self.interval
+    self.snapshot()
+
+  def close(self):
+    """
+    Takes a last snapshot once every batch handed over so far is counted, and stops serving.
+    """
+    if self.thread is not None:
+      self.queue.put(None)
+      self.thread.join()
+      self.thread = None
+    if self.server is not None:
+      self.server.shutdown()
+      self.server.server_close()
+      self.server = None
+    if self.manager is not None:
+      self.manager.shutdown()
+      self.manager = None
+
+  def snapshot(self):
+    now = time.monotonic()
+    last_time, last_games = self.last_snapshot
+    if now > last_time:
+      self.games_per_second = (self.totals.games - last_games) / (now - last_time)
+    self.last_snapshot = (now, self.totals.games)
+    self.text = self.prometheus_text(now)
+    self.json = json.dumps(self.as_dict(now), indent=2)
+    if self.path is not None:
+      temp_path = f"{self.path}.tmp"
+      with open(temp_path, "w") as f:
+        f.write(self.json if self.path.endswith(".json") else self.text)
+      os.replace(temp_path, self.path)
+
+  def as_dict(self, now) -> Dict:
+    totals = self.totals
+    return {
+      "elapsed_seconds": now - self.started,
+      "games": totals.games,
+      "games_per_second": self.games_per_second,
+      "rounds": totals.rounds,
+      "bids": totals.bids,
+      "calls": totals.calls,
+      "forced_calls": totals.forced_calls,
+      "calls_out_of_turn": totals.calls_out_of_turn,
+      "rounds_per_game": dict(totals.rounds_per_game.cumulative()),
+      "bids_per_round": dict(totals.bids_per_round.cumulative()),
+      "strategies": {
+        strategy: {"games": games, "wins": wins, "win_rate": wins / games}
+        for strategy, (games, wins) in totals.strategies.items()
+      },
+    }
+
+  def prometheus_text(self, now) -> str:
+    totals = self.totals
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+      lines.append(f"# HELP liars_dice_{name} {help_text}")
+      lines.append(f"# TYPE liars_dice_{name} {kind}")
+      for labels, value in samples:
+        lines.append(f"liars_dice_{name}{labels} {value}")
+
+    def histogram(name, help_text, histogram):
+      samples = [(f'_bucket{{le="{bound}"}}', count) for bound, count in histogram.cumulative()]
+      samples += [("_sum", histogram.sum), ("_count", histogram.count)]
+      metric(name, "histogram", help_text, samples)
+
+    metric("elapsed_seconds", "gauge", "Seconds since the tournament started.", [("", now - self.started)])
+    metric("games_total", "counter", "Games completed.", [("", totals.games)])
+    metric("games_per_second", "gauge", "Games completed per second since the last snapshot.", [("", self.games_per_second)])
+    metric("rounds_total", "counter", "Rounds played.", [("", totals.rounds)])
+    metric("bids_total", "counter", "Bids made.", [("", totals.bids)])
+    metric("calls_total", "counter", "Bids called.", [("", totals.calls)])
+    metric("forced_calls_total", "counter", "Calls forced by an invalid bid.", [("", totals.forced_calls)])
+    metric("calls_out_of_turn_total", "counter", "Bids called out of turn.", [("", totals.calls_out_of_turn)])
+    histogram("rounds_per_game", "Rounds in each game.", totals.rounds_per_game)
+    histogram("bids_per_round", "Bids in each round.", totals.bids_per_round)
+    strategies = sorted(totals.strategies.items())
+    metric("strategy_games_total", "counter", "Games played by each strategy.",
+      [(f'{{strategy="{strategy}"}}', games) for strategy, (games, _) in strategies])
+    metric("strategy_wins_total", "counter", "Games won by each strategy.",
+      [(f'{{strategy="{strategy}"}}', wins) for strategy, (_, wins) in strategies])
+    metric("strategy_win_rate", "gauge", "Fraction of their games each strategy won.",
+      [(f'{{strategy="{strategy}"}}', wins / games) for strategy, (games, wins) in strategies])
+    return "\n".join(lines) + "\n"
+
+  def serve(self):
+    metrics = self
+
+    class Handler(BaseHTTPRequestHandler):
+      def do_GET(self):
+        if self.path in ("/", "/metrics"):
+          body, content_type = metrics.text, "text/plain; version=0.0.4"
+        elif self.path == "/metrics.json":
+          body, content_type = metrics.json, "application/json"
+        else:
+          self.send_error(404)
+          return
+        data = body.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+      def log_message(self, format, *args):
+        return
+
+    self.server = ThreadingHTTPServer(("127.0.0.1", self.port), Handler)
+    threading.Thread(target=self.server.serve_forever, daemon=True).start()
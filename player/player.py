@@ -4,6 +4,9 @@ from player.player_stats import PlayerStats
 from player.strategy.strategy import Strategy
 
 
+DICE_FACES = (1, 2, 3, 4, 5, 6)
+
+
 class Player:
   """
   Represents a player with a strategy.
@@ -11,16 +14,27 @@ class Player:
   """
   def __init__(self, name: str, strategy, num_dice: int = 5):
     self.name = name
-    self.dice = []
+    self.dice = ()
+    self.starting_dice = num_dice
     self.num_dice = num_dice
     self.strategy = strategy(name)
     self.stats = PlayerStats()
 
-  def roll_dice(self):
+  def reset(self):
+    """
+    Gets the player ready to play another game: all their dice back, empty stats, and a reset strategy.
+    """
+    self.dice = ()
+    self.num_dice = self.starting_dice
+    self.stats.reset()
+    if hasattr(self.strategy, 'reset'):
+      self.strategy.reset()
+
+  def roll_dice(self, rng=random):
     if self.is_alive:
-      self.dice = [random.randint(1, 6) for _ in range(self.num_dice)]
+      self.dice = tuple(rng.choices(DICE_FACES, k=self.num_dice))
     else:
-      self.dice = []
+      self.dice = ()
 
   @property
   def is_alive(self):
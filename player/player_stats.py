@@ -1,38 +1,152 @@
-class PlayerStats:
+import math
+
+
+class LatencyHistogram:
+  """
+  Counts decision times in log-spaced buckets (about 19% wide), so percentiles
+  can be read off in constant memory.
+  """
+  BUCKETS_PER_DOUBLING = 4
+
   def __init__(self):
-    self.performance = []
+    self.buckets = {}  # bucket -> count
+    self.count = 0
+    self.max = 0.0
+
+  @staticmethod
+  def bucket(seconds: float) -> int:
+    nanoseconds = max(seconds * 1e9, 1.0)
+    return int(math.log2(nanoseconds) * LatencyHistogram.BUCKETS_PER_DOUBLING)
+
+  @staticmethod
+  def bucket_upper_bound(bucket: int) -> float:
+    return 2 ** ((bucket + 1) / LatencyHistogram.BUCKETS_PER_DOUBLING) / 1e9
+
+  def record(self, seconds: float):
+    bucket = LatencyHistogram.bucket(seconds)
+    self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+    self.count += 1
+    self.max = max(self.max, seconds)
+
+  def percentile(self, fraction: float) -> float:
+    """
+    Upper bound of the bucket the given fraction of decisions fall in, in seconds.
+    """
+    if self.count == 0:
+      return 0.0
+    target = fraction * self.count
+    seen = 0
+    for bucket in sorted(self.buckets):
+      seen += self.buckets[bucket]
+      if seen >= target:
+        return min(LatencyHistogram.bucket_upper_bound(bucket), self.max)
+    return self.max
+
+  @property
+  def p50(self):
+    return self.percentile(0.5)
+
+  @property
+  def p99(self):
+    return self.percentile(0.99)
+
+  def update(self, other: 'LatencyHistogram'):
+    for bucket, count in other.buckets.items():
+      self.buckets[bucket] = self.buckets.get(bucket, 0) + count
+    self.count += other.count
+    self.max = max(self.max, other.max)
+
+  def __repr__(self):
+    return f"p50: {self.p50 * 1e6:.1f}us, p99: {self.p99 * 1e6:.1f}us, max: {self.max * 1e6:.1f}us"
+
+
+class PlayerStats:
+  """
+  Running totals of how a player did.
+  Everything is kept as counts and sums, so memory stays the same no matter how many
+  games are played. Pass `keep_samples=True` to also keep the raw per-game placings,
+  dice left, and per-call probabilities.
+  """
+  CALL_HISTOGRAM_BINS = 20
+
+  def __init__(self, keep_samples: bool = False):
+    self.keep_samples = keep_samples
+    self.placements = []  # number of games finished in each place, 0 being a win
+    self.performance_sum = 0
     self.bids = 0
-    self.calls = []
+    self.num_calls = 0
+    self.call_probability_sum = 0.0
+    self.call_histogram = [0] * PlayerStats.CALL_HISTOGRAM_BINS
     self.bids_called = 0
     self.successful_bids = 0
     self.successful_calls = 0
     self.calls_out_of_turn = 0
-    self.dice_left = []
+    self.forced_calls = 0  # calls forced by making an invalid bid
+    self.games_won_with_dice = 0
+    self.winning_dice_sum = 0
+    # Only filled in when decisions are timed
+    self.latencies = {}  # decision -> LatencyHistogram
+    self.timeouts = 0
+
+    # Raw samples, only kept when asked for
+    self.performance = [] if keep_samples else None
+    self.calls = [] if keep_samples else None
+    self.dice_left = [] if keep_samples else None
+
+  @staticmethod
+  def call_bin(probability: float) -> int:
+    return min(int(probability * PlayerStats.CALL_HISTOGRAM_BINS), PlayerStats.CALL_HISTOGRAM_BINS - 1)
+
+  def record_game(self, placing: int, dice_left: int):
+    while len(self.placements) <= placing:
+      self.placements.append(0)
+    self.placements[placing] += 1
+    self.performance_sum += placing
+    if dice_left > 0:
+      self.games_won_with_dice += 1
+      self.winning_dice_sum += dice_left
+    if self.keep_samples:
+      self.performance.append(placing)
+      self.dice_left.append(dice_left)
+
+  def record_call(self, probability: float):
+    self.num_calls += 1
+    self.call_probability_sum += probability
+    self.call_histogram[PlayerStats.call_bin(probability)] += 1
+    if self.keep_samples:
+      self.calls.append(probability)
+
+  def record_latency(self, decision: str, seconds: float):
+    if decision not in self.latencies:
+      self.latencies[decision] = LatencyHistogram()
+    self.latencies[decision].record(seconds)
 
   @property
   def wins(self):
-    return sum(1 for p in self.performance if p == 0)
+    if len(self.placements) > 0:
+      return self.placements[0]
+    return 0
 
   @property
   def avg_performance(self):
-    if len(self.performance) > 0:
-      return round((sum(self.performance) + len(self.performance)) / len(self.performance), 2)
+    if self.games > 0:
+      return round((self.performance_sum + self.games) / self.games, 2)
     return None
 
   @property
   def games(self):
-    return len(self.performance)
+    return sum(self.placements)
 
   @property
   def avg_call_probability(self):
-    if len(self.calls) > 0:
-      return round(sum(self.calls) / len(self.calls), 2)
+    if self.num_calls > 0:
+      return round(self.call_probability_sum / self.num_calls, 2)
     return 0
 
   @property
   def call_accuracy(self):
-    if len(self.calls) > 0:
-      return round(self.successful_calls / len(self.calls), 2)
+    if self.num_calls > 0:
+      return round(self.successful_calls / self.num_calls, 2)
     return 1
 
   @property
@@ -40,42 +154,89 @@ class PlayerStats:
     if self.bids_called > 0:
       return round(self.successful_bids / self.bids_called, 2)
     return 1
-  
+
   @property
   def winning_dice(self):
+    if not self.keep_samples:
+      raise ValueError("Raw samples weren't kept for these stats")
     return [dice for dice in self.dice_left if dice > 0]
 
   @property
   def avg_dice_left(self):
-    if len(self.winning_dice) > 0:
-      return round(sum(self.winning_dice) / len(self.winning_dice))
+    if self.games_won_with_dice > 0:
+      return round(self.winning_dice_sum / self.games_won_with_dice)
     return 0
 
   def update(self, other: 'PlayerStats'):
-    self.performance.extend(other.performance)
+    while len(self.placements) < len(other.placements):
+      self.placements.append(0)
+    for placing, count in enumerate(other.placements):
+      self.placements[placing] += count
+    self.performance_sum += other.performance_sum
     self.bids += other.bids
-    self.calls.extend(other.calls)
+    self.num_calls += other.num_calls
+    self.call_probability_sum += other.call_probability_sum
+    for i, count in enumerate(other.call_histogram):
+      self.call_histogram[i] += count
     self.bids_called += other.bids_called
     self.successful_bids += other.successful_bids
     self.successful_calls += other.successful_calls
     self.calls_out_of_turn += other.calls_out_of_turn
-    self.dice_left.extend(other.dice_left)
+    self.forced_calls += other.forced_calls
+    self.games_won_with_dice += other.games_won_with_dice
+    self.winning_dice_sum += other.winning_dice_sum
+    for decision, histogram in other.latencies.items():
+      if decision not in self.latencies:
+        self.latencies[decision] = LatencyHistogram()
+      self.latencies[decision].update(histogram)
+    self.timeouts += other.timeouts
+
+    if self.keep_samples and other.keep_samples:
+      self.performance.extend(other.performance)
+      self.calls.extend(other.calls)
+      self.dice_left.extend(other.dice_left)
+    elif self.keep_samples:
+      # The other stats have no samples to add, so ours would be incomplete
+      self.keep_samples = False
+      self.performance = None
+      self.calls = None
+      self.dice_left = None
 
   def reset(self):
-    self.performance = []
+    """
+    Empties the stats in place, without allocating new ones.
+    """
+    self.placements.clear()
+    self.performance_sum = 0
     self.bids = 0
-    self.calls = []
+    self.num_calls = 0
+    self.call_probability_sum = 0.0
+    for i in range(0, PlayerStats.CALL_HISTOGRAM_BINS):
+      self.call_histogram[i] = 0
     self.bids_called = 0
     self.successful_bids = 0
     self.successful_calls = 0
     self.calls_out_of_turn = 0
-    self.dice_left = []
+    self.forced_calls = 0
+    self.games_won_with_dice = 0
+    self.winning_dice_sum = 0
+    self.latencies.clear()
+    self.timeouts = 0
+    if self.keep_samples:
+      self.performance.clear()
+      self.calls.clear()
+      self.dice_left.clear()
 
   def __repr__(self):
+    timing = ""
+    if len(self.latencies) > 0:
+      timing = f"| timeouts -- Total: {self.timeouts}\n"
+      for decision, histogram in self.latencies.items():
+        timing += f"| {decision} -- {histogram}\n"
     return f"""-------------- {self.games} Games --------------
 | performance -- w: {self.wins}, avg: {self.avg_performance}
 | bids -- Total: {self.bids}, c: {self.bids_called}, s: {self.successful_bids}, acc: {self.bid_accuracy},
-| calls -- Total: {len(self.calls)}, oot: {self.calls_out_of_turn}, s: {self.successful_calls}, avg: {self.avg_call_probability}, acc: {self.call_accuracy},
+| calls -- Total: {self.num_calls}, oot: {self.calls_out_of_turn}, s: {self.successful_calls}, avg: {self.avg_call_probability}, acc: {self.call_accuracy},
 | dice left -- Total: {self.avg_dice_left}
--------------------------------------
-"""
\ No newline at end of file
+{timing}-------------------------------------
+"""
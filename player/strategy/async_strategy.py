@@ -0,0 +1,93 @@
+from typing import Tuple
+
+from game.bid import Bid
+from player.strategy.strategy import Strategy
+
+
+class AsyncStrategy:
+  """
+  Base class for a strategy whose decisions are awaited, for strategies that spend their time
+  waiting on something else (a model served by another process, a person on the other end of a socket).
+  Only played by `AsyncLiarDiceGame`. It takes the same arguments as `Strategy`, and plays the
+  same way unless overridden:
+  - async challenge_bid(...)
+  - async make_bid(...)
+  - async prepare_for_new_round(...)
+  """
+  CALL_PROBABILITY_THRESHOLD = Strategy.CALL_PROBABILITY_THRESHOLD
+  READS_PROBABILITY_OF_TRUTH = True
+
+  def __init__(self, name):
+    self.name = name
+
+  def reset(self):
+    """
+    Same as `Strategy.reset`. Not awaited, since it's called while a game is being set up.
+    """
+    return
+
+  async def challenge_bid(
+    self,
+    round_history: Tuple[Tuple[str, Bid], ...],
+    current_bid: Bid,
+    dice_counts: Tuple[Tuple[str, int], ...],
+    probability_of_truth: float,
+    turns_until_my_turn: int,
+    my_dice: Tuple[int, ...],
+    out_of_turn: bool
+  ) -> bool:
+    return probability_of_truth < self.CALL_PROBABILITY_THRESHOLD
+
+  async def prepare_for_new_round(
+    self,
+    dice_counts: Tuple[Tuple[str, int], ...],
+    my_dice: Tuple[int, ...]
+  ):
+    return
+
+  async def make_bid(
+    self,
+    round_history: Tuple[Tuple[str, Bid], ...],
+    current_bid: Bid,
+    dice_counts: Tuple[Tuple[str, int], ...],
+    turns_until_my_turn: int,
+    my_dice: Tuple[int, ...]
+  ) -> Bid:
+    return Strategy.make_bid(self, round_history, current_bid, dice_counts, turns_until_my_turn, my_dice)
+
+
+class SyncStrategyAdapter(AsyncStrategy):
+  """
+  Lets a regular `Strategy` be awaited. Its decisions are made right away, without giving up the event loop.
+  """
+  def __init__(self, strategy):
+    self.name = strategy.name
+    self.strategy = strategy
+    self.READS_PROBABILITY_OF_TRUTH = getattr(strategy, "READS_PROBABILITY_OF_TRUTH", True)
+
+  @property
+  def strategy_class(self):
+    """
+    The class of the adapted strategy, for anything that reports on strategies by class.
+    """
+    return getattr(self.strategy, "strategy_class", type(self.strategy))
+
+  def reset(self):
+    if hasattr(self.strategy, 'reset'):
+      self.strategy.reset()
+
+  async def challenge_bid(self, *args) -> bool:
+    return self.strategy.challenge_bid(*args)
+
+  async def prepare_for_new_round(self, *args):
+    if hasattr(self.strategy, 'prepare_for_new_round'):
+      return self.strategy.prepare_for_new_round(*args)
+
+  async def make_bid(self, *args) -> Bid:
+    return self.strategy.make_bid(*args)
+
+
+def as_async_strategy(strategy) -> AsyncStrategy:
+  if isinstance(strategy, AsyncStrategy):
+    return strategy
+  return SyncStrategyAdapter(strategy)
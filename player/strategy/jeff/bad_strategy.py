@@ -1,58 +1,80 @@
-import copy
-from math import comb
-from typing import List, Tuple
+from functools import lru_cache
+from operator import mul
+from typing import Tuple
 
 from game.bid import Bid
+from game.probability import convolve, probability_at_least, tail_table
 from player.strategy.strategy import Strategy
 from player.strategy.jeff.opponent import Opponent
 
 
 class BadStrategy(Strategy):
-  SAFE_BID_THRESHOLD = 0.7
   CHALLENGE_BID_THRESHOLD = 0.15
+  PROBABILITY_TABLE_CACHE_SIZE = 4096
+  READS_PROBABILITY_OF_TRUTH = False  # challenge_bid works it out from the opponents' bids instead
 
   def __init__(self, name):
     self.name = name
     self.my_turn = 0
     self.opponents = []
+    self.opponents_by_name = {}
+    self.history_seen = 0  # how much of the round's history the opponents have been updated with
+    self.face_distributions = {}  # face value -> matching_tails for the opponents as they are now
     self.my_dice = []
-    self.valid_bids = {}
+    self.face_best_bids_cache = {}  # face value -> face_best_bids for the opponents as they are now
     self.total_dice = 0
 
-  def determine_valid_bids(self):
-    self.valid_bids.clear()
-    for face_value in range(2, 7): # range end is exclusive
-      self.valid_bids[face_value] = {}
-      for number_of_dice in range(1, self.total_dice + 1):
-        bid = Bid(number_of_dice, face_value)
-        probability = self.compute_probability(bid)
-        self.valid_bids[face_value][number_of_dice] = probability
-
-  def determine_safe_bids_left(self, bid):
-    safe_bids = []
-
-    for number_of_dice in range(bid.number_of_dice + 1, self.total_dice + 1):
-      if self.valid_bids[bid.face_value][number_of_dice] >= BadStrategy.SAFE_BID_THRESHOLD:
-          safe_bids.append(Bid(number_of_dice, bid.face_value))
-
-    for face_value in range(bid.face_value + 1, 7):
-      for number_of_dice in range(bid.number_of_dice, self.total_dice + 1):
-        if self.valid_bids[face_value][number_of_dice] >= BadStrategy.SAFE_BID_THRESHOLD:
-          safe_bids.append(Bid(number_of_dice, face_value))
-
-    return safe_bids
-
-  def calc_needed_probability(self, needed, remaining):
-    p_match = 1/3
-    prob = 0.0
-    for k in range(needed, remaining + 1):
-      prob += comb(remaining, k) * (p_match**k) * ((1 - p_match)**(remaining - k))
-    
-    return prob
+  def observe(self, round_history):
+    """
+    Updates what I think of each opponent's dice with the bids they've made since I last looked.
+    """
+    for name, bid in round_history[self.history_seen:]:
+      opponent = self.opponents_by_name.get(name)
+      if opponent is not None:
+        opponent.update_target_value(bid)
+        self.face_distributions.pop(bid.face_value, None)
+        self.face_best_bids_cache.pop(bid.face_value, None)
+    self.history_seen = len(round_history)
+
+  @staticmethod
+  @lru_cache(maxsize=PROBABILITY_TABLE_CACHE_SIZE)
+  def matching_tails(bidders: Tuple[Tuple[int, int], ...], rest: int, bluff_weight: float) -> Tuple[float, ...]:
+    """
+    Probability that at least t of the opponents' dice match a face, for t = 0..(all their dice).
+    `bidders` are the (dice, bids on the face) of the opponents who've bid on it, and `rest` is how many dice
+    everyone else has. Their posteriors are convolved, and the rest, still the prior, are one binomial.
+    """
+    distribution = (1.0,)
+    for num_dice, num_bids in bidders:
+      distribution = convolve(distribution, Opponent.posterior(num_dice, num_bids, bluff_weight))
+    # Each tail sums, over how many dice the bidders have matching, the chance the rest make up the difference.
+    # `rest_tails` is that chance for every difference, from the most down, padded so each tail is one slice of it.
+    width = len(distribution)
+    rest_tails = [0.0] * (width - 1) + list(reversed(tail_table(rest)[1:])) + [1.0] * width
+    tails = []
+    for needed in range(0, width + rest):
+      start = width + rest - 1 - needed
+      tails.append(sum(map(mul, distribution, rest_tails[start:start + width])))
+    return tuple(tails)
+
+  def opponent_matching_tails(self, face_value):
+    tails = self.face_distributions.get(face_value)
+    if tails is None:
+      bidders = []
+      rest = 0
+      for opponent in self.opponents:
+        num_bids = opponent.face_bids.get(face_value)
+        if num_bids is None:
+          rest += opponent.num_dice
+        else:
+          bidders.append((opponent.num_dice, num_bids))
+      tails = BadStrategy.matching_tails(tuple(sorted(bidders)), rest, Opponent.BLUFF_WEIGHT)
+      self.face_distributions[face_value] = tails
+    return tails
 
   def compute_probability(self, bid) -> float:
     """
-    Compute the probability of the given bid with what I know
+    Compute the probability of the given bid with what I know, including what the opponents' bids say about their dice.
     """
     if bid is None or self.total_dice == 0:
       return 1.0  # If no bid or no known dice in play
@@ -60,63 +82,73 @@ class BadStrategy(Strategy):
     # Known count from perspective player's dice
     known_count = sum(1 for d in self.my_dice if d == bid.face_value or d == 1)
 
-    # Unknown dice
-    unknown_count = self.total_dice - len(self.my_dice)
-
     if known_count >= bid.number_of_dice:
       return 1.0
 
     needed = bid.number_of_dice - known_count
 
-    # Probability that a single unknown die matches (face_value or 1): 1/3
-    return self.calc_needed_probability(needed, unknown_count)
+    tails = self.opponent_matching_tails(bid.face_value)
+    if needed >= len(tails):
+      return 0.0
+    return tails[needed]
+
+  def face_best_bids(self, face_value):
+    """
+    Indexes the best bid on a face with at least some number of dice, by that number, as (score, number_of_dice, probability).
+    A bid's score is how much likelier it is from my view, which includes what the opponents' bids say about
+    their dice, than from an opponent's who knows nothing. Ties go to the fewest dice.
+    Built from the same tails as `compute_probability`, so it's rebuilt whenever an opponent bids on the face.
+    """
+    best_bids = self.face_best_bids_cache.get(face_value)
+    if best_bids is None:
+      known_count = sum(1 for d in self.my_dice if d == face_value or d == 1)
+      tails = self.opponent_matching_tails(face_value)
+      # everyone else's dice are unknown, the same as for `compute_probability`
+      unknown_count = self.total_dice
+      best_bids = [None] * (self.total_dice + 2)
+      best = None
+      for number_of_dice in range(self.total_dice, 0, -1):
+        needed = number_of_dice - known_count
+        if needed <= 0:
+          probability = 1.0
+        elif needed < len(tails):
+          probability = tails[needed]
+        else:
+          probability = 0.0
+        score = probability - probability_at_least(number_of_dice, unknown_count)
+        if best is None or score >= best[0]:
+          best = (score, number_of_dice, probability)
+        best_bids[number_of_dice] = best
+      self.face_best_bids_cache[face_value] = best_bids
+    return best_bids
 
   def get_next_best_bid(self, current_bid):
-    best_prob_diff = 0.0
-    best_bid = Bid(1, 1)
-    best_bid_prob = 0.0
-    
-    bid = Bid(1, 2)
-    if current_bid is not None:
-      bid.number_of_dice = current_bid.number_of_dice
-      bid.face_value = current_bid.face_value
+    """
+    The bid with the best score that's higher than `current_bid` (see `face_best_bids`), and its probability.
+    If no bid scores above 0, that's (1 x 2) to open the round, or an invalid bid otherwise.
+    """
+    if current_bid is None:
+      face_value, number_of_dice = 2, 1
     else:
-      best_bid = bid
-      best_bid_prob = self.valid_bids[2][1]
-      best_bid_prob = self.calc_needed_probability(1, self.total_dice - len(self.my_dice))
-
-
-    # for face_value in range(current_bid.face_value, 7):
-    #   for number_of_dice in range(current_bid.number_of_dice + 1, self.total_dice + 1):
-    #     if best_probability < self.valid_bids[face_value][number_of_dice]:
-    #       best_probability = self.valid_bids[face_value][number_of_dice]
-    #       best_bid = Bid(number_of_dice, face_value)
-    for number_of_dice in range(bid.number_of_dice + 1, self.total_dice + 1):
-      bid_prob = self.valid_bids[bid.face_value][number_of_dice]
-      opp_prob = self.calc_needed_probability(number_of_dice, self.total_dice - len(self.my_dice))
-      prob_diff = bid_prob - opp_prob
-      if best_prob_diff < prob_diff:
-        best_prob_diff = prob_diff
-        best_bid = Bid(number_of_dice, bid.face_value)
-        best_bid_prob = self.valid_bids[bid.face_value][number_of_dice]
-
-    for face_value in range(bid.face_value + 1, 7):
-      for number_of_dice in range(bid.number_of_dice, self.total_dice + 1):
-        bid_prob = self.valid_bids[face_value][number_of_dice]
-        opp_prob = self.calc_needed_probability(number_of_dice, self.total_dice - len(self.my_dice))
-        prob_diff = bid_prob - opp_prob
-        if best_prob_diff < prob_diff:
-          best_prob_diff = prob_diff
-          best_bid = Bid(number_of_dice, face_value)
-          best_bid_prob = self.valid_bids[face_value][number_of_dice]
-
-    safer_bid = Bid(best_bid.number_of_dice, best_bid.face_value)
-    if current_bid is not None and safer_bid.is_valid and safer_bid.is_higher_than(current_bid):
-      best_bid_prob = self.valid_bids[safer_bid.face_value][safer_bid.number_of_dice]
-      best_bid = safer_bid
-
-
-    return best_bid, best_bid_prob
+      face_value, number_of_dice = current_bid.face_value, current_bid.number_of_dice
+
+    # Higher bids are either more of the same face, or any higher face with at least as many dice
+    best, best_face = None, None
+    if number_of_dice + 1 <= self.total_dice:
+      best, best_face = self.face_best_bids(face_value)[number_of_dice + 1], face_value
+    if number_of_dice <= self.total_dice:
+      for higher_face in range(face_value + 1, 7):
+        higher = self.face_best_bids(higher_face)[number_of_dice]
+        if best is None or higher[0] > best[0]:
+          best, best_face = higher, higher_face
+
+    if best is not None and best[0] > 0.0:
+      _, number_of_dice, probability = best
+      return Bid(number_of_dice, best_face), probability
+
+    if current_bid is None:
+      return Bid(1, 2), self.compute_probability(Bid(1, 2))
+    return Bid(1, 1), 0.0
 
   def orient_turns_to_me(self):
     for i in range(0, len(self.opponents)):
@@ -137,12 +169,12 @@ class BadStrategy(Strategy):
 
   def challenge_bid(
     self,
-    round_history: List[Tuple[str, Bid]],
+    round_history: Tuple[Tuple[str, Bid], ...],
     current_bid: Bid,
-    dice_counts: List[Tuple[str, int]],
+    dice_counts: Tuple[Tuple[str, int], ...],
     probability_of_truth: float,
     turns_until_my_turn: int,
-    my_dice: List[int],
+    my_dice: Tuple[int, ...],
     out_of_turn: bool
   ) -> bool:
     """
@@ -153,6 +185,8 @@ class BadStrategy(Strategy):
   - make_bid(...):
       Returns a valid higher bid. If the bid is deemed invalid, player is forced to call the last bid.
   """
+    self.observe(round_history)
+    probability_of_truth = self.compute_probability(current_bid)
     if out_of_turn:
       return probability_of_truth < 0.1
 
@@ -169,14 +203,18 @@ class BadStrategy(Strategy):
 
   def prepare_for_new_round(
     self,
-    dice_counts: List[Tuple[str, int]],
-    my_dice: List[int]
+    dice_counts: Tuple[Tuple[str, int], ...],
+    my_dice: Tuple[int, ...]
   ):
     """
     Any setup to do at the start of the round to execute the strategy effectively.
     """
     self.my_dice = my_dice
     self.opponents.clear()
+    self.opponents_by_name.clear()
+    self.face_distributions.clear()
+    self.face_best_bids_cache.clear()
+    self.history_seen = 0
     self.total_dice = 0
     self.my_turn
 
@@ -190,19 +228,19 @@ class BadStrategy(Strategy):
       opponent = Opponent(name, turn, num_dice)
       opponent.update_target_value()
       self.opponents.append(opponent)
+      self.opponents_by_name[name] = opponent
 
     self.orient_turns_to_me()
-    self.determine_valid_bids()
 
     return
 
   def make_bid(
     self,
-    round_history: List[Tuple[str, Bid]],
+    round_history: Tuple[Tuple[str, Bid], ...],
     current_bid: Bid,
-    dice_counts: List[Tuple[str, int]],
+    dice_counts: Tuple[Tuple[str, int], ...],
     turns_until_my_turn: int,
-    my_dice: List[int]
+    my_dice: Tuple[int, ...]
   ) -> Bid:
     """
     Make a valid higher bid.
@@ -210,16 +248,6 @@ class BadStrategy(Strategy):
       - If no current bid: start at (1,2).
       - If there is a bid: increment face value if possible, else increment number_of_dice.
     """
-    bids_left = []
+    self.observe(round_history)
     best_bid, _ = self.get_next_best_bid(current_bid)
-    # if current_bid is None:
-      # bids_left = self.determine_safe_bids_left(Bid(1, 2))
-    # else:
     return best_bid
-
-    # if len(bids_left) == 0:
-      # bids_left = self.determine_safe_bids_left(current_bid)
-      # return best_bid
-
-    # target_index = self.get_target_index(len(bids_left))
-    # return bids_left[target_index]
@@ -1,13 +1,43 @@
+from functools import lru_cache
+from typing import Tuple
+
 from game.bid import Bid
+from game.probability import binomial_pmf
 
 class Opponent:
+  # How much a bid says about the bidder's dice: a player holding k dice that match a face
+  # bids on it with likelihood proportional to k + BLUFF_WEIGHT, so bluffs are never ruled out
+  BLUFF_WEIGHT = 1.0
+
   def __init__(self, name, turn, num_dice):
     self.name = name
     self.turn = turn
     self.num_dice = num_dice
     self.target_value = 0.0
     self.bids = []
+    # face value -> how many bids they've made on it. `posterior` has the probability that exactly k of their dice
+    # match it (including wilds). Faces they haven't bid on are still the prior, a binomial with p = 1/3.
+    self.face_bids = {}
+
+  @staticmethod
+  @lru_cache(maxsize=None)
+  def posterior(num_dice: int, num_bids: int, bluff_weight: float) -> Tuple[float, ...]:
+    """
+    Bayes' rule on the number of a player's dice matching a face, after they've bid on it `num_bids` times.
+    Only depends on those few numbers, so every opponent shares the same few tables.
+    """
+    if num_bids == 0:
+      return binomial_pmf(num_dice)
+    prior = Opponent.posterior(num_dice, num_bids - 1, bluff_weight)
+    weights = [p * (k + bluff_weight) for k, p in enumerate(prior)]
+    total = sum(weights)
+    return tuple(w / total for w in weights)
 
   def update_target_value(self, last_bid=None):
     if last_bid is not None:
       self.bids.append(last_bid)
+      self.update_posterior(last_bid)
+
+  def update_posterior(self, bid: Bid):
+    num_bids = self.face_bids.get(bid.face_value, 0) + 1
+    self.face_bids[bid.face_value] = num_bids
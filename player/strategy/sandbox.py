@@ -0,0 +1,281 @@
+import itertools
+import multiprocessing
+import pickle
+import threading
+import weakref
+from functools import partial
+from typing import Tuple
+
+from game.bid import Bid
+from player.strategy.strategy import Strategy
+
+
+PREPARE_FOR_NEW_ROUND = 0
+MAKE_BID = 1
+CHALLENGE_BID = 2
+METHODS = ("prepare_for_new_round", "make_bid", "challenge_bid")
+
+# What a strategy is taken to have decided when it crashed or raised.
+# An invalid bid forces a call (or loses a die on the first bid), and a failed challenge passes.
+INVALID_BID = Bid(0, 0)
+FAILED_RESULTS = (None, INVALID_BID, False)
+
+
+def serve(strategy_class, connection):
+  """
+  The worker process: keeps every instance of `strategy_class` it's asked about, and answers batches of calls.
+  Each batch is (released instance ids, [(instance id, player name, method, args), ...]),
+  and is answered with [(ok, result), ...] in the same order.
+  """
+  instances = {}
+  while True:
+    try:
+      released, requests = pickle.loads(connection.recv_bytes())
+    except EOFError:
+      return
+    for instance_id in released:
+      instances.pop(instance_id, None)
+
+    results = []
+    for instance_id, name, method, args in requests:
+      try:
+        strategy = instances.get(instance_id)
+        if strategy is None:
+          strategy = instances[instance_id] = strategy_class(name)
+        results.append((True, getattr(strategy, METHODS[method])(*args)))
+      except Exception as e:
+        results.append((False, repr(e)))
+    connection.send_bytes(pickle.dumps(results, pickle.HIGHEST_PROTOCOL))
+
+
+class Request:
+  __slots__ = ("message", "result", "done")
+
+  def __init__(self, message):
+    self.message = message
+    self.result = None
+    self.done = None  # only needed by callers waiting on someone else's batch
+
+
+class StrategyWorker:
+  """
+  A long-lived process that runs every instance of one strategy class.
+  Calls from all games are queued. Whichever caller finds no batch in flight sends everything
+  that has queued up as one batch, and keeps sending until the queue is empty, so games played
+  concurrently share each round trip while a lone game pays for just one.
+  If the process dies, or takes longer than `timeout` seconds to answer a batch, it's restarted
+  and the calls in flight count as failed.
+  """
+  MAX_BATCH = 256
+  TIMEOUT = 60.0
+
+  def __init__(self, strategy_class, context=None, timeout=TIMEOUT):
+    self.strategy_class = strategy_class
+    self.context = context if context is not None else multiprocessing.get_context()
+    self.timeout = timeout
+    self.lock = threading.Lock()
+    self.pending = []
+    self.sending = False
+    self.released = []
+    self.restarts = 0
+    self.failures = 0
+    self.start_process()
+
+  def start_process(self):
+    self.connection, child = self.context.Pipe()
+    self.process = self.context.Process(target=serve, args=(self.strategy_class, child), daemon=True)
+    self.process.start()
+    child.close()
+
+  def restart_process(self):
+    self.connection.close()
+    if self.process.is_alive():
+      self.process.kill()
+    self.process.join()
+    self.restarts += 1
+    self.start_process()
+
+  def call(self, instance_id, name, method, args):
+    """
+    Returns (ok, result) of calling `method` on the instance. Blocks until its batch comes back.
+    """
+    request = Request((instance_id, name, method, args))
+    with self.lock:
+      self.pending.append(request)
+      if self.sending:
+        leader = False
+        request.done = threading.Event()
+      else:
+        self.sending = leader = True
+
+    if not leader:
+      request.done.wait()
+      return request.result
+
+    batch = []
+    sent_everything = False
+    try:
+      while True:
+        with self.lock:
+          batch = self.pending[:StrategyWorker.MAX_BATCH]
+          del self.pending[:StrategyWorker.MAX_BATCH]
+          released, self.released = self.released, []
+          if len(batch) == 0:
+            self.sending = False
+            sent_everything = True
+            break
+        results = self.send(released, [r.message for r in batch])
+        self.finish(batch, results)
+        batch = []
+    finally:
+      if not sent_everything:
+        # Sending went wrong some other way (say the arguments couldn't be pickled): fail everything
+        # still waiting on this leader, so nobody waits forever, and let the next caller take over
+        with self.lock:
+          self.sending = False
+          left, self.pending = self.pending, []
+        unfinished = batch + left
+        self.finish(unfinished, [(False, "batch failed")] * len(unfinished))
+    return request.result
+
+  def finish(self, batch, results):
+    for r, result in zip(batch, results):
+      if not result[0]:
+        self.failures += 1
+      r.result = result
+      if r.done is not None:
+        r.done.set()
+
+  def release(self, instance_id):
+    with self.lock:
+      self.released.append(instance_id)
+
+  def send(self, released, messages):
+    try:
+      self.connection.send_bytes(pickle.dumps((released, messages), pickle.HIGHEST_PROTOCOL))
+      if not self.connection.poll(self.timeout):
+        # a hung worker counts the same as a crashed one
+        self.restart_process()
+        return [(False, "worker timed out")] * len(messages)
+      return pickle.loads(self.connection.recv_bytes())
+    except (EOFError, OSError):
+      self.restart_process()
+      return [(False, "worker crashed")] * len(messages)
+
+  def close(self):
+    self.connection.close()
+    self.process.join(timeout=1)
+    if self.process.is_alive():
+      self.process.kill()
+
+
+class SandboxedStrategy(Strategy):
+  """
+  Stands in for a strategy that runs in a `StrategyWorker` process.
+  Every copy is a separate instance in the worker, created fresh the first time it's called,
+  the same way each game gets its own copy of an in-process strategy.
+  """
+  ids = itertools.count()
+
+  def __init__(self, worker: StrategyWorker, name):
+    self.name = name
+    self.worker = worker
+    self.instance_id = next(SandboxedStrategy.ids)
+    self.finalizer = weakref.finalize(self, worker.release, self.instance_id)
+
+  @property
+  def strategy_class(self):
+    """
+    The class of the strategy in the worker, for anything that reports on strategies by class.
+    """
+    return self.worker.strategy_class
+
+  def __deepcopy__(self, memo):
+    return SandboxedStrategy(self.worker, self.name)
+
+  def reset(self):
+    # a new instance in the worker, the same as a fresh copy would get.
+    # The old instance is released now, so its finalizer isn't needed any more.
+    self.finalizer.detach()
+    self.worker.release(self.instance_id)
+    self.instance_id = next(SandboxedStrategy.ids)
+    self.finalizer = weakref.finalize(self, self.worker.release, self.instance_id)
+
+  def __reduce__(self):
+    raise TypeError("Sandboxed strategies can't be sent to other processes")
+
+  def call(self, method, args):
+    ok, result = self.worker.call(self.instance_id, self.name, method, args)
+    if not ok:
+      return FAILED_RESULTS[method]
+    return result
+
+  def challenge_bid(
+    self,
+    round_history: Tuple[Tuple[str, Bid], ...],
+    current_bid: Bid,
+    dice_counts: Tuple[Tuple[str, int], ...],
+    probability_of_truth: float,
+    turns_until_my_turn: int,
+    my_dice: Tuple[int, ...],
+    out_of_turn: bool
+  ) -> bool:
+    return self.call(CHALLENGE_BID, (round_history, current_bid, dice_counts, probability_of_truth, turns_until_my_turn, my_dice, out_of_turn))
+
+  def prepare_for_new_round(
+    self,
+    dice_counts: Tuple[Tuple[str, int], ...],
+    my_dice: Tuple[int, ...]
+  ):
+    return self.call(PREPARE_FOR_NEW_ROUND, (dice_counts, my_dice))
+
+  def make_bid(
+    self,
+    round_history: Tuple[Tuple[str, Bid], ...],
+    current_bid: Bid,
+    dice_counts: Tuple[Tuple[str, int], ...],
+    turns_until_my_turn: int,
+    my_dice: Tuple[int, ...]
+  ) -> Bid:
+    bid = self.call(MAKE_BID, (round_history, current_bid, dice_counts, turns_until_my_turn, my_dice))
+    if not isinstance(bid, Bid):
+      return INVALID_BID
+    return bid
+
+
+class StrategyPool:
+  """
+  Runs strategies in worker processes, one long-lived worker per strategy class, so a strategy
+  that crashes or leaks memory can't take the tournament down with it.
+
+    with StrategyPool() as pool:
+      players = [Player("Alice", pool.strategy(Strategy)), Player("Jeff", pool.strategy(BadStrategy))]
+      Tournament(players, concurrent_games=64).run()
+
+  Calls are batched across games, so play games concurrently (`Tournament(concurrent_games=...)`)
+  to get the most out of each round trip.
+  """
+  def __init__(self, context=None, timeout=StrategyWorker.TIMEOUT):
+    self.context = context
+    # seconds a worker has to answer a batch of calls before it's restarted
+    self.timeout = timeout
+    self.workers = {}
+
+  def strategy(self, strategy_class):
+    """
+    Something to pass to `Player` in place of `strategy_class`.
+    """
+    if strategy_class not in self.workers:
+      self.workers[strategy_class] = StrategyWorker(strategy_class, self.context, self.timeout)
+    return partial(SandboxedStrategy, self.workers[strategy_class])
+
+  def close(self):
+    for worker in self.workers.values():
+      worker.close()
+    self.workers.clear()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exc):
+    self.close()
@@ -0,0 +1,40 @@
+import asyncio
+from typing import Tuple
+
+from game.bid import Bid
+from player.strategy.async_strategy import AsyncStrategy
+
+
+class SlowStrategy(AsyncStrategy):
+  """
+  Plays like the default `Strategy`, but waits `LATENCY` seconds before every bid and challenge,
+  standing in for a strategy that asks a model in another process what to do.
+  The waits of games played at once by `AsyncLiarDiceGame` overlap.
+  """
+  LATENCY = 0.005
+
+  async def challenge_bid(
+    self,
+    round_history: Tuple[Tuple[str, Bid], ...],
+    current_bid: Bid,
+    dice_counts: Tuple[Tuple[str, int], ...],
+    probability_of_truth: float,
+    turns_until_my_turn: int,
+    my_dice: Tuple[int, ...],
+    out_of_turn: bool
+  ) -> bool:
+    await asyncio.sleep(self.LATENCY)
+    return await super().challenge_bid(
+      round_history, current_bid, dice_counts, probability_of_truth, turns_until_my_turn, my_dice, out_of_turn
+    )
+
+  async def make_bid(
+    self,
+    round_history: Tuple[Tuple[str, Bid], ...],
+    current_bid: Bid,
+    dice_counts: Tuple[Tuple[str, int], ...],
+    turns_until_my_turn: int,
+    my_dice: Tuple[int, ...]
+  ) -> Bid:
+    await asyncio.sleep(self.LATENCY)
+    return await super().make_bid(round_history, current_bid, dice_counts, turns_until_my_turn, my_dice)
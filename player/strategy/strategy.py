@@ -1,9 +1,13 @@
-from typing import List, Tuple
+from typing import Tuple
 
 from game.bid import Bid
 
 
 class Strategy:
+  CALL_PROBABILITY_THRESHOLD = 0.4
+  # Set to False if challenge_bid doesn't use probability_of_truth. It's then only worked out if it's used after all.
+  READS_PROBABILITY_OF_TRUTH = True
+
   def __init__(self, name):
     self.name = name
 
@@ -17,23 +21,30 @@ class Strategy:
   """
   def challenge_bid(
     self,
-    round_history: List[Tuple[str, Bid]],
+    round_history: Tuple[Tuple[str, Bid], ...],
     current_bid: Bid,
-    dice_counts: List[Tuple[str, int]],
+    dice_counts: Tuple[Tuple[str, int], ...],
     probability_of_truth: float,
     turns_until_my_turn: int,
-    my_dice: List[int],
+    my_dice: Tuple[int, ...],
     out_of_turn: bool
   ) -> bool:
     # Out-of-turn players can only call if they strongly suspect bluff,
     # or pass otherwise. Let's do a simple heuristic:
     # If probability < 0.4, call, else pass.
-    return probability_of_truth < 0.4
+    return probability_of_truth < self.CALL_PROBABILITY_THRESHOLD
+
+  def reset(self):
+    """
+    Called when the player is reused for another game, instead of playing it with a fresh copy.
+    Strategies that keep anything from one game to the next should clear it here.
+    """
+    return
 
   def prepare_for_new_round(
     self,
-    dice_counts: List[Tuple[str, int]],
-    my_dice: List[int]
+    dice_counts: Tuple[Tuple[str, int], ...],
+    my_dice: Tuple[int, ...]
   ):
     """
     Any setup to do at the start of the round to execute the strategy effectively.
@@ -43,11 +54,11 @@ class Strategy:
 
   def make_bid(
     self,
-    round_history: List[Tuple[str, Bid]],
+    round_history: Tuple[Tuple[str, Bid], ...],
     current_bid: Bid,
-    dice_counts: List[Tuple[str, int]],
+    dice_counts: Tuple[Tuple[str, int], ...],
     turns_until_my_turn: int,
-    my_dice: List[int]
+    my_dice: Tuple[int, ...]
   ) -> Bid:
     """
     Make a valid higher bid.
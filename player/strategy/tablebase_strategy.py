@@ -0,0 +1,90 @@
+import random
+from typing import Tuple
+
+from game.bid import Bid
+from game.tablebase import Tablebase
+from player.strategy.jeff.bad_strategy import BadStrategy
+
+
+class TablebaseStrategy(BadStrategy):
+  """
+  Plays heads-up endgames from a tablebase built by `tablebase_solver.py`, and plays like `BadStrategy` until then.
+  The table mixes between moves, so decisions are drawn from a random number generator seeded with the player's
+  name, which keeps seeded tournaments reproducible.
+  """
+  TABLEBASE_PATH = "endgame.tb"
+  # Opened tablebases, shared by every copy of the strategy
+  tablebases = {}
+
+  def __init__(self, name):
+    super().__init__(name)
+    if self.TABLEBASE_PATH not in TablebaseStrategy.tablebases:
+      TablebaseStrategy.tablebases[self.TABLEBASE_PATH] = Tablebase(self.TABLEBASE_PATH)
+    self.rng = random.Random(name)
+    self.planned_bid = None  # (bid it raises, bid to make) decided while passing on a challenge
+
+  def reset(self):
+    # every game draws the same numbers it would have from a fresh copy
+    self.rng = random.Random(self.name)
+    self.planned_bid = None
+
+  @property
+  def tablebase(self) -> Tablebase:
+    return TablebaseStrategy.tablebases[self.TABLEBASE_PATH]
+
+  def position(self, round_history, dice_counts, my_dice):
+    """
+    (starter dice, responder dice, my actor) if this is a heads-up round the tablebase covers, otherwise None.
+    """
+    if len(dice_counts) != 2:
+      return None
+    opponent_dice = next(num_dice for name, num_dice in dice_counts if name != self.name)
+    starter = len(round_history) == 0 or round_history[0][0] == self.name
+    if starter:
+      position = (len(my_dice), opponent_dice, 0)
+    else:
+      position = (opponent_dice, len(my_dice), 1)
+    if not self.tablebase.covers(position[0], position[1]):
+      return None
+    return position
+
+  def challenge_bid(
+    self,
+    round_history: Tuple[Tuple[str, Bid], ...],
+    current_bid: Bid,
+    dice_counts: Tuple[Tuple[str, int], ...],
+    probability_of_truth: float,
+    turns_until_my_turn: int,
+    my_dice: Tuple[int, ...],
+    out_of_turn: bool
+  ) -> bool:
+    position = self.position(round_history, dice_counts, my_dice)
+    if position is None:
+      return super().challenge_bid(
+        round_history, current_bid, dice_counts, probability_of_truth, turns_until_my_turn, my_dice, out_of_turn
+      )
+    # the table decides between calling and raising in one go, so remember the raise for make_bid
+    bid = self.tablebase.choose(*position, current_bid, my_dice, self.rng.random())
+    if bid is None:
+      return True
+    self.planned_bid = (current_bid, bid)
+    return False
+
+  def make_bid(
+    self,
+    round_history: Tuple[Tuple[str, Bid], ...],
+    current_bid: Bid,
+    dice_counts: Tuple[Tuple[str, int], ...],
+    turns_until_my_turn: int,
+    my_dice: Tuple[int, ...]
+  ) -> Bid:
+    position = self.position(round_history, dice_counts, my_dice)
+    if position is None:
+      return super().make_bid(round_history, current_bid, dice_counts, turns_until_my_turn, my_dice)
+    if self.planned_bid is not None and self.planned_bid[0] == current_bid:
+      return self.planned_bid[1]
+    bid = self.tablebase.choose(*position, current_bid, my_dice, self.rng.random())
+    if bid is None:
+      # an invalid bid calls the last one
+      return Bid(0, 0)
+    return bid
@@ -0,0 +1,210 @@
+import json
+import math
+import os
+from contextlib import contextmanager
+from typing import Dict, List
+
+try:
+  import fcntl
+except ImportError:  # Windows: runs sharing a ratings file aren't locked out of each other while saving
+  fcntl = None
+
+
+class Rating:
+  """
+  What's known about a player's strength: a normal distribution with mean `mu` and standard deviation `sigma`.
+  """
+  __slots__ = ("mu", "sigma", "games")
+
+  def __init__(self, mu: float, sigma: float, games: int = 0):
+    self.mu = mu
+    self.sigma = sigma
+    self.games = games
+
+  @property
+  def conservative(self) -> float:
+    """
+    A rating the player is very likely to be at least as good as, for ranking players with few games fairly.
+    """
+    return self.mu - 3 * self.sigma
+
+  def __repr__(self):
+    return f"{self.mu:.2f} ± {self.sigma:.2f} ({self.games} games)"
+
+
+class Ratings:
+  """
+  Multiplayer ratings, updated from the standings of each game as it finishes, in O(players) per game.
+  The update is the Plackett-Luce one from Weng & Lin, "A Bayesian Approximation Method for Online Ranking" (2011):
+  the winner beat everyone, second place beat everyone but the winner, and so on, so results from any
+  table size and lineup go on the same scale.
+
+  Players are rated by name. Ratings can be saved, loaded, and merged: every `Ratings` remembers what it
+  started from, so merging adds only what its own games showed. Merging is approximate (see `merge`),
+  so it's for combining separate runs; a parallel `Tournament` rates every game in order instead,
+  and gets the same ratings as a serial run.
+  """
+  MU = 25.0
+  SIGMA = MU / 3
+  BETA = SIGMA / 2  # how much performance varies from game to game
+  KAPPA = 1e-4  # keeps sigma from collapsing to 0
+
+  def __init__(self):
+    self.ratings: Dict[str, Rating] = {}
+    self.start: Dict[str, Rating] = {}  # each player's rating before these games, for merging
+
+  def rating(self, name: str) -> Rating:
+    if name not in self.ratings:
+      self.ratings[name] = Rating(Ratings.MU, Ratings.SIGMA)
+      self.start[name] = Rating(Ratings.MU, Ratings.SIGMA)
+    return self.ratings[name]
+
+  def update(self, standings: List):
+    """
+    Updates the ratings of the players in `standings`, in order of placing (the winner first),
+    as returned by `LiarDiceGame.play_game`.
+    """
+    self.update_names([p.name for p in standings])
+
+  def update_names(self, names: List[str]):
+    """
+    Same as `update`, with the players' names in order of placing.
+    """
+    ratings = [self.rating(name) for name in names]
+    c = math.sqrt(sum(r.sigma * r.sigma + Ratings.BETA * Ratings.BETA for r in ratings))
+    strengths = [math.exp(r.mu / c) for r in ratings]
+
+    # Place q was taken from everyone who finished at q or lower. Each player took part in every
+    # place down to their own, which prefix sums over the places give in one pass.
+    remaining = [0.0] * len(ratings)
+    total = 0.0
+    for q in range(len(ratings) - 1, -1, -1):
+      total += strengths[q]
+      remaining[q] = total
+    chance_sum = 0.0
+    variance_sum = 0.0
+    updates = []
+    for i, r in enumerate(ratings):
+      chance_sum += 1 / remaining[i]
+      variance_sum += 1 / (remaining[i] * remaining[i])
+      # (chance i took each place they were in the running for), and the sum of p * (1 - p) over those places
+      chances = strengths[i] * chance_sum
+      variances = chances - strengths[i] * strengths[i] * variance_sum
+      variance = r.sigma * r.sigma
+      omega = variance / c * (1 - chances)
+      # gamma = 1 / players. The paper suggests sigma / c; this is a choice of ours, which makes each game
+      # add about the same precision however far a run has got, so merging runs stays a fair approximation
+      delta = variance / (c * c) * variances / len(ratings)
+      updates.append((omega, delta))
+    for r, (omega, delta) in zip(ratings, updates):
+      r.mu += omega
+      r.sigma *= math.sqrt(max(1 - delta, Ratings.KAPPA))
+      r.games += 1
+
+  def fork(self) -> 'Ratings':
+    """
+    A copy to play more games with, that remembers where it started, so it can be merged back in.
+    """
+    forked = Ratings()
+    for name, r in self.ratings.items():
+      forked.ratings[name] = Rating(r.mu, r.sigma, r.games)
+      forked.start[name] = Rating(r.mu, r.sigma, r.games)
+    return forked
+
+  def merge(self, other: 'Ratings'):
+    """
+    Adds what `other`'s games showed since it started. Ratings are combined as normal distributions:
+    each run's games add to the precision (1 / sigma²) and precision-weighted mean of the ratings,
+    and games only ever add precision. This is a heuristic: rating updates aren't independent normal
+    observations, so merged ratings are close to, but not the same as, rating every game in one run.
+    """
+    for name, after in other.ratings.items():
+      before = other.start[name]
+      mine = self.rating(name)
+      precision = 1 / mine.sigma ** 2 + 1 / after.sigma ** 2 - 1 / before.sigma ** 2
+      weighted = mine.mu / mine.sigma ** 2 + after.mu / after.sigma ** 2 - before.mu / before.sigma ** 2
+      mine.mu = weighted / precision
+      mine.sigma = math.sqrt(1 / precision)
+      mine.games += after.games - before.games
+
+  def leaderboard(self) -> List[tuple]:
+    """
+    (name, rating) of every player, best first by conservative rating.
+    """
+    return sorted(self.ratings.items(), key=lambda item: item[1].conservative, reverse=True)
+
+  def save(self, path: str):
+    """
+    Saves the ratings, and what they started from, so they can still be merged with other runs after loading.
+    """
+    def as_dict(ratings):
+      return {name: {"mu": r.mu, "sigma": r.sigma, "games": r.games} for name, r in ratings.items()}
+
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w") as f:
+      json.dump({"ratings": as_dict(self.ratings), "start": as_dict(self.start)}, f, indent=2)
+    os.replace(temp_path, path)
+
+  @staticmethod
+  def same(a: Dict[str, Rating], b: Dict[str, Rating]) -> bool:
+    """
+    Whether two sets of ratings are exactly the same.
+    """
+    return a.keys() == b.keys() and all((a[n].mu, a[n].sigma, a[n].games) == (b[n].mu, b[n].sigma, b[n].games) for n in a)
+
+  @staticmethod
+  @contextmanager
+  def locked(path: str):
+    """
+    Holds a lock on `path` (through a `.lock` file next to it), so only one run at a time saves over it.
+    """
+    if fcntl is None:
+      yield
+      return
+    with open(f"{path}.lock", "w") as lock:
+      fcntl.flock(lock, fcntl.LOCK_EX)
+      try:
+        yield
+      finally:
+        fcntl.flock(lock, fcntl.LOCK_UN)
+
+  def save_merged(self, path: str) -> 'Ratings':
+    """
+    Saves ratings forked from the ones saved at `path` back to it, without losing what other runs
+    saved there in the meantime: if the file has changed since, this run's games are merged into it (see `merge`).
+    Returns the ratings as saved, which can be saved again without counting their games twice.
+    """
+    with Ratings.locked(path):
+      saved = Ratings.load(path)
+      if Ratings.same(saved.ratings, self.ratings):
+        return saved
+      # players who weren't in the file yet start from the default rating
+      new = {name: r for name, r in self.start.items() if name not in saved.ratings}
+      if Ratings.same({**saved.ratings, **new}, self.start) and all(
+        (r.mu, r.sigma, r.games) == (Ratings.MU, Ratings.SIGMA, 0) for r in new.values()
+      ):
+        self.save(path)
+        return self
+      saved.merge(self)
+      saved.save(path)
+      return saved
+
+  @staticmethod
+  def load(path: str) -> 'Ratings':
+    """
+    Ratings saved with `save`, or empty ratings if there's no file yet.
+    To play more games with them, use a `fork` of them.
+    """
+    ratings = Ratings()
+    if not os.path.exists(path):
+      return ratings
+    with open(path) as f:
+      saved = json.load(f)
+    for name, r in saved["ratings"].items():
+      ratings.ratings[name] = Rating(r["mu"], r["sigma"], r["games"])
+    for name, r in saved["start"].items():
+      ratings.start[name] = Rating(r["mu"], r["sigma"], r["games"])
+    return ratings
+
+  def __repr__(self):
+    return "\n".join(f"{name}: {r} -- conservative: {r.conservative:.2f}" for name, r in self.leaderboard())
@@ -0,0 +1,149 @@
+import copy
+import itertools
+import math
+from typing import Dict, List, Tuple
+
+from utils.color_printer import *
+from liars_dice import LiarDiceGame
+from player.player import Player
+from player.player_stats import PlayerStats
+from player.strategy import strategy
+from player.strategy.jeff import bad_strategy
+from tournament import Tournament
+
+
+class RoundRobinTournament:
+  """
+  Plays every lineup of `table_size` players from a pool, one matchup at a time.
+  Within a matchup, games cycle through every rotation of the seating (and its reverse),
+  so each player spends as long in each seat, and next to each opponent, as everyone else.
+
+  Each matchup stops as soon as its ranking is settled: once every player's win rate is either
+  separated from the next one's by their confidence intervals, or known closely enough
+  (intervals narrower than `tie_width`) to call them even. Otherwise it stops after `max_games`.
+  """
+  def __init__(
+    self,
+    players: List[Player],
+    table_size=None,
+    seed=None,
+    min_games=1000,
+    max_games=100000,
+    check_every=500,
+    z=3.0,
+    tie_width=0.05
+  ):
+    self.players = players
+    self.table_size = table_size if table_size is not None else len(players)
+    self.seed = seed
+    self.min_games = min_games
+    self.max_games = max_games
+    # The ranking is checked every `check_every` games. Every check is another chance for a
+    # lucky streak to look settled, so the intervals are wider (`z` standard deviations)
+    # than they'd need to be for a single look at the results.
+    self.check_every = check_every
+    self.z = z
+    self.tie_width = tie_width
+    self.player_map = {p.name: p for p in players}
+    self.results = {}  # lineup (names) -> {name: PlayerStats}
+
+  def lineups(self) -> List[Tuple[Player, ...]]:
+    return list(itertools.combinations(self.players, self.table_size))
+
+  @staticmethod
+  def seatings(lineup) -> List[List[Player]]:
+    """
+    Every rotation of the lineup and of its reverse. The first seat starts the game.
+    """
+    seatings = []
+    for order in (list(lineup), list(reversed(lineup))):
+      for r in range(0, len(order)):
+        seating = order[r:] + order[:r]
+        if seating not in seatings:
+          seatings.append(seating)
+    return seatings
+
+  @staticmethod
+  def win_rate_interval(wins: int, games: int, z: float) -> Tuple[float, float]:
+    """
+    Wilson score interval of a win rate, which stays sensible for win rates near 0 or 1.
+    """
+    if games == 0:
+      return 0.0, 1.0
+    rate = wins / games
+    denominator = 1 + z * z / games
+    center = (rate + z * z / (2 * games)) / denominator
+    margin = z * math.sqrt(rate * (1 - rate) / games + z * z / (4 * games * games)) / denominator
+    return max(0.0, center - margin), min(1.0, center + margin)
+
+  def ranking(self, stats: Dict[str, PlayerStats]) -> List[str]:
+    return sorted(stats, key=lambda name: stats[name].wins, reverse=True)
+
+  def is_settled(self, stats: Dict[str, PlayerStats]) -> bool:
+    ranking = self.ranking(stats)
+    for better, worse in zip(ranking, ranking[1:]):
+      better_low, better_high = RoundRobinTournament.win_rate_interval(stats[better].wins, stats[better].games, self.z)
+      worse_low, worse_high = RoundRobinTournament.win_rate_interval(stats[worse].wins, stats[worse].games, self.z)
+      separated = better_low > worse_high
+      even = max(better_high - better_low, worse_high - worse_low) < self.tie_width
+      if not separated and not even:
+        return False
+    return True
+
+  def play_matchup(self, lineup, matchup_index) -> Dict[str, PlayerStats]:
+    """
+    Plays a lineup until its ranking is settled, and returns the stats of each player keyed by name.
+    """
+    players = copy.deepcopy(list(lineup))
+    for player in players:
+      player.stats = PlayerStats(player.stats.keep_samples)
+    results = {p.name: PlayerStats(p.stats.keep_samples) for p in players}
+    seatings = RoundRobinTournament.seatings(players)
+    seed = Tournament.game_seed(self.seed, matchup_index) if self.seed is not None else None
+
+    game_index = 0
+    next_check = max(self.min_games, self.check_every)
+    while game_index < self.max_games:
+      # a whole cycle of seatings at a time, so the seats stay balanced
+      for seating in seatings:
+        game = LiarDiceGame(seating, rng=Tournament.game_rng(seed, game_index), shuffle=False, reuse_players=True)
+        for s in game.play_game():
+          results[s.name].update(s.stats)
+        game_index += 1
+      if game_index >= next_check:
+        if self.is_settled(results):
+          break
+        next_check += self.check_every
+    return results
+
+  def run(self):
+    for matchup_index, lineup in enumerate(self.lineups()):
+      results = self.play_matchup(lineup, matchup_index)
+      self.results[tuple(p.name for p in lineup)] = results
+      for name, stats in results.items():
+        self.player_map[name].stats.update(stats)
+      self.print_matchup(results)
+
+    ColorPrinter.cprint(Color.CYAN, "\n******************** RESULTS ********************")
+    for player in self.players:
+      ColorPrinter.cprint(Color.BLUE, player.name)
+      print(player.stats)
+
+  def print_matchup(self, results: Dict[str, PlayerStats]):
+    ranking = self.ranking(results)
+    games = results[ranking[0]].games
+    settled = "settled" if self.is_settled(results) else "not settled"
+    ColorPrinter.cprint(Color.CYAN, f"\n{' vs '.join(ranking)} -- {games} games, {settled}")
+    for name in ranking:
+      stats = results[name]
+      low, high = RoundRobinTournament.win_rate_interval(stats.wins, stats.games, self.z)
+      print(f"| {name} -- win rate: {stats.wins / stats.games:.3f} ({low:.3f} - {high:.3f})")
+
+
+if __name__ == "__main__":
+  players = [
+    Player("Alice", strategy.Strategy),
+    Player("Bob", strategy.Strategy),
+    Player("Jeff", bad_strategy.BadStrategy)
+  ]
+  RoundRobinTournament(players, table_size=2, seed=0).run()
@@ -0,0 +1,298 @@
+"""
+Solves heads-up endgames and writes them to a tablebase for `TablebaseStrategy`.
+
+  python tablebase_solver.py --max-dice 5 --output endgame.tb
+
+Each round of a two-player game is solved with CFR+, with every game it can lead to already solved,
+so the value of a round is the probability of going on to win the whole game.
+With two players, the last bid decides every move that's still legal and how a call turns out,
+so decisions are made from the last bid and your own roll. That's the only simplification:
+a player doesn't use what the earlier bids said about the other player's dice. So the tables are approximate:
+a player who remembers every bid can win a little more often against them, up to about 1% of games
+(--exploitability prints how much for each round).
+"""
+import argparse
+import math
+import time
+from typing import Tuple
+
+import numpy as np
+
+from game import tablebase
+from game.tablebase import HEADER, MAGIC, VALUE, VERSION, CUMULATIVE_SCALE, CALL
+
+DEFAULT_ITERATIONS = 500
+# While working out how likely each situation is, every player is assumed to make any legal move
+# with at least this probability, so there's something sensible to play after bids the solution never makes.
+TREMBLE = 0.02
+
+
+def roll_matrix(num_dice: int) -> Tuple[np.ndarray, np.ndarray]:
+  """
+  For every roll of `num_dice`, how many dice match each face (including wilds), and how likely the roll is.
+  """
+  rolls = tablebase.rolls(num_dice)
+  matching = np.zeros((len(rolls), 7), dtype=np.int64)
+  probabilities = np.zeros(len(rolls))
+  for i, roll in enumerate(rolls):
+    faces = [roll.count(face) for face in range(0, 7)]
+    matching[i] = [faces[face] + faces[1] for face in range(0, 7)]
+    ways = math.factorial(num_dice)
+    for count in faces:
+      ways //= math.factorial(count)
+    probabilities[i] = ways / 6 ** num_dice
+  return matching, probabilities
+
+
+def legal_actions(total_dice: int) -> np.ndarray:
+  """
+  legal[node, action]: whether the action can be taken after the node's bid. Nothing can be called before the first bid.
+  """
+  bids = tablebase.num_bids(total_dice)
+  legal = np.zeros((bids + 1, bids + 1), dtype=bool)
+  legal[0, 1:] = True
+  for node in range(1, bids + 1):
+    current = tablebase.index_bid(node)
+    legal[node, CALL] = True
+    for action in range(node + 1, bids + 1):
+      legal[node, action] = tablebase.index_bid(action).is_higher_than(current)
+  return legal
+
+
+def regret_matching(regrets, legal):
+  positive = np.where(legal[:, None, :], np.maximum(regrets, 0.0), 0.0)
+  totals = positive.sum(axis=2, keepdims=True)
+  uniform = np.broadcast_to(legal[:, None, :] / np.maximum(legal.sum(axis=1), 1)[:, None, None], positive.shape)
+  return np.where(totals > 0, positive / np.where(totals > 0, totals, 1.0), uniform)
+
+
+class RoundSolver:
+  """
+  One round of a heads-up game, with the starter (actor 0) holding `starter_dice` and the responder (actor 1) `responder_dice`.
+  `win` and `lose` are the starter's chances of winning the game after winning or losing the round.
+
+  Node n is the state after bid n has been made (node 0 before the first bid), and either actor can be the one to move.
+  Everything about an actor's nodes is from that actor's side, indexed by their own roll first:
+  - reach[actor]: [actor's roll, node, other roll], how likely the node is to be reached with those rolls
+  - values[actor]: [other roll, node, actor's roll], the actor's chances of winning the game from the node,
+    laid out so the other actor can read them off with their own roll first
+  """
+  def __init__(self, starter_dice: int, responder_dice: int, win: float, lose: float):
+    total_dice = starter_dice + responder_dice
+    self.num_nodes = tablebase.num_bids(total_dice) + 1
+    self.legal = legal_actions(total_dice)
+    self.uniform = self.legal / np.maximum(self.legal.sum(axis=1), 1)[:, None]
+    matching0, p0 = roll_matrix(starter_dice)
+    matching1, p1 = roll_matrix(responder_dice)
+    self.probabilities = (p0, p1)
+
+    # Each actor's chances if they call the bid at each node, from their own side
+    self.call_values = [np.zeros((self.num_nodes, len(p0), len(p1))), np.zeros((self.num_nodes, len(p1), len(p0)))]
+    for node in range(1, self.num_nodes):
+      bid = tablebase.index_bid(node)
+      holds = matching0[:, None, bid.face_value] + matching1[None, :, bid.face_value] >= bid.number_of_dice
+      self.call_values[0][node] = np.where(holds, lose, win)
+      self.call_values[1][node] = np.where(holds, 1.0 - win, 1.0 - lose).T
+
+    self.regrets = [np.zeros((self.num_nodes, len(p), self.num_nodes)) for p in self.probabilities]
+    self.strategy_sums = [np.zeros_like(r) for r in self.regrets]
+
+  def nodes(self, actor):
+    """
+    The nodes the actor can be the one to move at. Only the starter moves before the first bid.
+    """
+    return range(0 if actor == 0 else 1, self.num_nodes)
+
+  def reach(self, strategies):
+    """
+    How likely each node is to be reached, with both actors trembling. A node only knows the last bid,
+    so it's summed over every way the bids could have got there. Returns (reach, own):
+    - reach[actor]: [actor's roll, node, other roll], with those rolls, from both actors' moves
+    - own[actor]: [actor's roll, node], from the actor's own moves alone
+    """
+    p0, p1 = self.probabilities
+    reach = [np.zeros((len(p0), self.num_nodes, len(p1))), np.zeros((len(p1), self.num_nodes, len(p0)))]
+    reach[0][:, 0, :] = np.outer(p0, p1)
+    # other[actor]: [other roll, node], from the other actor's moves alone. A raise only adds to the raiser's part,
+    # so each actor's parts come from the other actor's parts at the nodes they raised from
+    own = [np.zeros((len(p0), self.num_nodes)), np.zeros((len(p1), self.num_nodes))]
+    other = [np.zeros((len(p1), self.num_nodes)), np.zeros((len(p0), self.num_nodes))]
+    own[0][:, 0] = 1.0
+    other[0][:, 0] = 1.0
+    # [actor's roll, node, action], so raises to a node line up with the reach of the nodes they came from
+    trembling = [((1 - TREMBLE) * s + TREMBLE * self.uniform[:, None, :]).transpose(1, 0, 2) for s in strategies]
+    trembling[1][:, 0, :] = 0.0
+    for node in range(1, self.num_nodes):
+      for actor in (0, 1):
+        raiser = 1 - actor
+        reached = np.matmul(trembling[raiser][:, None, :node, node], reach[raiser][:, :node, :])
+        reach[actor][:, node, :] = reached[:, 0, :].T
+        own[actor][:, node] = other[raiser][:, :node] @ self.legal[:node, node]
+        other[actor][:, node] = (own[raiser][:, :node] * trembling[raiser][:, :node, node]).sum(axis=1)
+    return reach, own
+
+  def values(self, strategies, reach=None, iteration=0):
+    """
+    Each actor's chances at every node when both play `strategies`.
+    With `reach` (from `reach`), also updates each actor's regrets and average strategy.
+
+    Regrets are weighted by how likely the node is to be reached by both actors' moves, not by the other actor's alone
+    as in the usual counterfactual reach. With the full bid history they'd give the same strategies, as the actor's own part
+    would be the same for every way to the node. Here a node stands for every history ending in its bid, and an
+    actor who only knows the last bid should weigh those histories by how likely they were to play them too.
+    Weighting by the other actor's moves alone was measured against a best response that knows the full history
+    (see `exploitability`) and was about twice as exploitable. The average strategy is weighted by the actor's own reach.
+    """
+    p0, p1 = self.probabilities
+    values = [np.zeros((len(p1), self.num_nodes, len(p0))), np.zeros((len(p0), self.num_nodes, len(p1)))]
+    for node in range(self.num_nodes - 1, -1, -1):
+      later = slice(node + 1, self.num_nodes)
+      for actor in (0, 1):
+        if node not in self.nodes(actor):
+          continue
+        strategy = strategies[actor][node]
+        # after a raise it's the other actor's move, and the actor's chances are the other way round
+        raises = values[1 - actor][:, later, :]
+        raised = strategy[:, later].sum(axis=1)
+        value = (
+          strategy[:, CALL, None] * self.call_values[actor][node]
+          + raised[:, None]
+          - np.matmul(strategy[:, None, later], raises)[:, 0, :]
+        )
+        values[actor][:, node, :] = value.T
+
+        if reach is None:
+          continue
+        reached, own = reach
+        weights = reached[actor][:, node, :]
+        # each action's value to the actor, summed over the other actor's rolls
+        action_values = np.zeros((len(strategy), self.num_nodes))
+        action_values[:, CALL] = (weights * self.call_values[actor][node]).sum(axis=1)
+        action_values[:, later] = weights.sum(axis=1)[:, None] - np.matmul(raises, weights[:, :, None])[:, :, 0]
+        node_value = (weights * value).sum(axis=1)
+        regrets = np.where(self.legal[node], action_values - node_value[:, None], 0.0)
+        self.regrets[actor][node] = np.maximum(self.regrets[actor][node] + regrets, 0.0)
+        # later iterations count for more in the average (linear averaging)
+        self.strategy_sums[actor][node] += iteration * own[actor][:, node, None] * strategy
+    return values
+
+  def best_response_value(self, strategies, actor):
+    """
+    The starter's chances of winning the game when `actor` plays the best response to the other actor's
+    strategy, knowing every bid made so far rather than just the last one. Goes through every bid history
+    the other actor can play, so it's only quick for small rounds, or strategies that rule most bids out.
+    """
+    other = 1 - actor
+    actor_probabilities, other_probabilities = self.probabilities[actor], self.probabilities[other]
+    actions = [np.flatnonzero(self.legal[node]) for node in range(0, self.num_nodes)]
+
+    def value(node, mover, other_reach):
+      # the actor's chances for each of their rolls, weighted by the other actor's rolls and how likely they are to play to here
+      if mover == actor:
+        best = None
+        for action in actions[node]:
+          if action == CALL:
+            action_value = self.call_values[actor][node] @ (other_probabilities * other_reach)
+          else:
+            action_value = value(action, other, other_reach)
+          best = action_value if best is None else np.maximum(best, action_value)
+        return best
+      total = np.zeros(len(actor_probabilities))
+      for action in actions[node]:
+        action_reach = other_reach * strategies[other][node][:, action]
+        if not action_reach.any():
+          continue
+        if action == CALL:
+          total += (1.0 - self.call_values[other][node]).T @ (other_probabilities * action_reach)
+        else:
+          total += value(action, actor, action_reach)
+      return total
+
+    actor_value = float(actor_probabilities @ value(0, 0, np.ones(len(other_probabilities))))
+    return actor_value if actor == 0 else 1.0 - actor_value
+
+  def exploitability(self, strategies):
+    """
+    How much better, on average, each actor could do against the other's `strategies` with a best response
+    (see `best_response_value`). 0 for strategies no one can do better against.
+    """
+    return (self.best_response_value(strategies, 0) - self.best_response_value(strategies, 1)) / 2
+
+  def average_strategies(self):
+    averages = []
+    for sums in self.strategy_sums:
+      totals = sums.sum(axis=2, keepdims=True)
+      uniform = np.broadcast_to(self.legal[:, None, :] / np.maximum(self.legal.sum(axis=1), 1)[:, None, None], sums.shape)
+      averages.append(np.where(totals > 0, sums / np.where(totals > 0, totals, 1.0), uniform))
+    return averages
+
+  def solve(self, iterations=DEFAULT_ITERATIONS):
+    """
+    Returns the starter's chances of winning the game, and the average strategy of each actor.
+    """
+    for iteration in range(1, iterations + 1):
+      strategies = [regret_matching(r, self.legal) for r in self.regrets]
+      self.values(strategies, self.reach(strategies), iteration)
+    strategies = self.average_strategies()
+    p0, p1 = self.probabilities
+    value = float((self.values(strategies)[0][:, 0, :] * np.outer(p1, p0)).sum())
+    return value, strategies
+
+
+def cumulative(strategy) -> np.ndarray:
+  """
+  Cumulative action probabilities, as stored in the tablebase.
+  """
+  table = np.rint(np.cumsum(strategy, axis=2) * CUMULATIVE_SCALE)
+  table = np.minimum(table, CUMULATIVE_SCALE)
+  table[..., -1] = CUMULATIVE_SCALE
+  return table.astype("<u2")
+
+
+def solve(max_dice, iterations=DEFAULT_ITERATIONS, verbose=False, exploitability=False):
+  """
+  Solves every round up to `max_dice` v `max_dice`, fewest dice first.
+  Returns the starter's chances of winning from each (starter dice, responder dice), and each round's strategies.
+  With `verbose` and `exploitability`, also prints how exploitable each round's strategies are, which takes a while.
+  """
+  values = np.zeros((max_dice + 1, max_dice + 1))
+  values[1:, 0] = 1.0
+  strategies = {}
+  for total_dice in range(2, 2 * max_dice + 1):
+    for a in range(max(1, total_dice - max_dice), min(max_dice, total_dice - 1) + 1):
+      b = total_dice - a
+      start = time.perf_counter()
+      # win the round and start the next one, or lose a die and the other player starts
+      win = values[a, b - 1]
+      lose = 1.0 - values[b, a - 1]
+      solver = RoundSolver(a, b, win, lose)
+      values[a, b], strategies[(a, b)] = solver.solve(iterations)
+      if verbose:
+        print(f"{a} v {b}: {values[a, b]:.4f} ({time.perf_counter() - start:.1f}s)")
+        if exploitability:
+          print(f"  exploitability: {solver.exploitability(strategies[(a, b)]):.4f}")
+  return values, strategies
+
+
+def write(path, max_dice, values, strategies):
+  with open(path, "wb") as f:
+    f.write(HEADER.pack(MAGIC, VERSION, max_dice))
+    for value in values.flatten():
+      f.write(VALUE.pack(value))
+    for a, b, actor in tablebase.block_order(max_dice):
+      f.write(cumulative(strategies[(a, b)][actor]).tobytes())
+
+
+def main():
+  parser = argparse.ArgumentParser(description="Solve heads-up Liar's Dice endgames")
+  parser.add_argument("--max-dice", type=int, default=5, help="most dice either player can have")
+  parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS, help="CFR+ iterations per round")
+  parser.add_argument("--output", default="endgame.tb")
+  parser.add_argument("--exploitability", action="store_true", help="print how exploitable each round's strategies are")
+  args = parser.parse_args()
+  values, strategies = solve(args.max_dice, args.iterations, verbose=True, exploitability=args.exploitability)
+  write(args.output, args.max_dice, values, strategies)
+
+
+if __name__ == "__main__":
+  main()
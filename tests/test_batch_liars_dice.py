@@ -0,0 +1,35 @@
+from batch_liars_dice import BatchLiarDiceGame
+from player.player import Player
+from player.strategy.strategy import Strategy
+from tournament import Tournament
+
+
+class NeverCalls(Strategy):
+  # raises until it can't, so its rounds end in forced calls
+  CALL_PROBABILITY_THRESHOLD = 0.0
+
+
+COUNTED = [
+  "bids", "num_calls", "bids_called", "successful_bids", "successful_calls", "calls_out_of_turn", "forced_calls",
+  "games_won_with_dice", "winning_dice_sum",
+]
+
+
+def make_players():
+  return [Player("Alice", Strategy), Player("Never", NeverCalls), Player("Nope", NeverCalls)]
+
+
+def test_batch_stats_match_the_scalar_engine():
+  scalar_games, batch_games = 2000, 20000
+  scalar = Tournament(make_players(), scalar_games, seed=1).play_games(0, scalar_games, 1)
+  batch = BatchLiarDiceGame(make_players(), batch_games, seed=1).play_games()
+
+  assert sum(stats.forced_calls for stats in batch.values()) > 0
+  for name in scalar:
+    # the engines roll different dice, so per-game averages only agree to within sampling error
+    for field in COUNTED:
+      scalar_mean = getattr(scalar[name], field) / scalar_games
+      batch_mean = getattr(batch[name], field) / batch_games
+      assert abs(scalar_mean - batch_mean) <= 0.05 * scalar_mean + 0.03, (name, field, scalar_mean, batch_mean)
+    for place in range(0, 3):
+      assert abs(scalar[name].placements[place] / scalar_games - batch[name].placements[place] / batch_games) <= 0.03
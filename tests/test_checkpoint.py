@@ -0,0 +1,43 @@
+from player.player import Player
+from player.strategy.strategy import Strategy
+from player.strategy.jeff.bad_strategy import BadStrategy
+from tournament import Tournament
+
+
+def make_tournament(tmp_path, **kwargs):
+  players = [Player("Alice", Strategy), Player("Bob", Strategy), Player("Jeff", BadStrategy)]
+  return Tournament(
+    players, num_games=20, seed=7, event_log=str(tmp_path / "events.bin"), checkpoint=str(tmp_path / "run.ckpt"), **kwargs
+  )
+
+
+def log_files(tournament):
+  contents = {}
+  for path in tournament.event_log_paths():
+    with open(path, "rb") as f:
+      contents[path] = f.read()
+  return contents
+
+
+def test_resuming_a_finished_run_leaves_the_log_alone(tmp_path):
+  tournament = make_tournament(tmp_path)
+  tournament.run()
+  logs = log_files(tournament)
+  assert all(len(log) > 0 for log in logs.values())
+
+  resumed = make_tournament(tmp_path)
+  resumed.run(resume=True)
+  assert log_files(resumed) == logs
+  for name, player in tournament.player_map.items():
+    assert resumed.player_map[name].stats.placements == player.stats.placements
+
+
+def test_resuming_a_finished_parallel_run_leaves_the_logs_alone(tmp_path):
+  tournament = make_tournament(tmp_path, num_processes=2)
+  tournament.run()
+  logs = log_files(tournament)
+  assert len(logs) > 1
+
+  resumed = make_tournament(tmp_path, num_processes=2)
+  resumed.run(resume=True)
+  assert log_files(resumed) == logs
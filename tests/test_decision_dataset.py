@@ -0,0 +1,64 @@
+import numpy as np
+
+from decision_dataset import BID, CALL, DECISION, PASS, DecisionDataset, generate
+from player.player import Player
+from player.strategy.strategy import Strategy
+from player.strategy.jeff.bad_strategy import BadStrategy
+
+
+class NeverCalls(Strategy):
+  # raises until it can't, so some of its bids are invalid and force a call
+  CALL_PROBABILITY_THRESHOLD = 0.0
+
+
+NUM_GAMES = 60
+
+
+def make_players():
+  return [Player("Alice", Strategy), Player("Never", NeverCalls), Player("Jeff", BadStrategy)]
+
+
+def as_rows(batches):
+  # records as bytes, sorted, to compare runs whatever order they were read in
+  return sorted(record.tobytes() for batch in batches for record in batch)
+
+
+def test_a_run_across_processes_reads_back_whole(tmp_path):
+  directory = str(tmp_path / "decisions")
+  # small shards, so each process writes a few, the last of them cut short
+  rows = generate(make_players(), NUM_GAMES, directory, seed=7, num_processes=2, shard_rows=500)
+  dataset = DecisionDataset(directory)
+  assert len(dataset.paths) > 2
+  assert len(dataset) == rows
+
+  batches = list(dataset.batches(128))
+  assert all(batch.dtype == DECISION and len(batch) <= 128 for batch in batches)
+  records = np.concatenate(batches)
+  assert len(records) == rows
+  # compared as bytes, since the probability of a bid is NaN
+  assert records.tobytes() == np.concatenate(list(dataset.shards())).tobytes()
+
+  shuffled = list(dataset.batches(128, shuffle=True, seed=1))
+  assert sum(len(batch) for batch in shuffled) == rows
+  assert as_rows(shuffled) == as_rows(batches)
+  assert np.concatenate(shuffled).tobytes() != records.tobytes()
+
+  # the same games, played in one process, make the same records
+  assert generate(make_players(), NUM_GAMES, str(tmp_path / "one"), seed=7) == rows
+  assert as_rows(DecisionDataset(str(tmp_path / "one")).batches(128)) == as_rows(batches)
+
+  assert set(np.unique(records["game"])) == set(range(0, NUM_GAMES))
+  assert set(np.unique(records["action"])) == {PASS, CALL, BID}
+  # my dice are the ones counted for my seat, and there's nobody past the third seat
+  assert np.array_equal(records["dice"].sum(axis=1), records["dice_counts"][:, 0])
+  assert not records["dice_counts"][:, 3:].any()
+  assert (records["loser"] < 3).all()
+
+  bids = records[records["action"] == BID]
+  assert (bids["action_bid"][:, 0] > 0).all() and (bids["action_bid"][:, 1] > 1).all()
+  assert not records[records["action"] != BID]["action_bid"].any()
+  # challenge_bid gets a probability, make_bid doesn't
+  made_bids = np.isnan(records["probability"])
+  assert (records[~made_bids]["action"] != BID).all()
+  # an invalid bid is recorded as the call it forces
+  assert (records[made_bids]["action"] == CALL).any()
@@ -0,0 +1,42 @@
+import pytest
+
+from game.event_log import EventLog, EventRecorder
+from player.player import Player
+from player.strategy.strategy import Strategy
+from player.strategy.jeff.bad_strategy import BadStrategy
+from tournament import Tournament
+
+
+class NeverCalls(Strategy):
+  # raises until it can't, so its rounds end in forced calls
+  CALL_PROBABILITY_THRESHOLD = 0.0
+
+
+def recorded_fields(stats):
+  # everything but decision latencies, which the log doesn't have. The probabilities are added up
+  # game by game live and all at once from the log, so their sums can differ in the last bits
+  fields = dict(vars(stats))
+  fields.pop("latencies")
+  fields["call_probability_sum"] = pytest.approx(fields["call_probability_sum"])
+  return fields
+
+
+def test_stats_rebuilt_from_the_log_match_the_live_stats(tmp_path):
+  path = str(tmp_path / "events.bin")
+  players = [Player("Alice", Strategy), Player("Jeff", BadStrategy), Player("Never", NeverCalls)]
+  tournament = Tournament(players, num_games=200, seed=3, event_log=path)
+  live = tournament.play_games(0, tournament.num_games, tournament.seed, path)
+
+  rebuilt = EventLog(path).player_stats()
+  assert live["Never"].forced_calls > 0
+  assert rebuilt.keys() == live.keys()
+  for name in live:
+    assert recorded_fields(rebuilt[name]) == recorded_fields(live[name])
+
+
+def test_names_too_long_for_the_log_are_rejected(tmp_path):
+  path = str(tmp_path / "events.bin")
+  with EventRecorder(path) as recorder:
+    with pytest.raises(ValueError):
+      recorder.game_start([Player("Alice", Strategy), Player("x" * 256, Strategy)])
+  assert list(EventLog(path).events()) == []
@@ -0,0 +1,18 @@
+from metrics import GameMetrics
+from liars_dice import LiarDiceGame
+from player.player import Player
+from player.strategy.strategy import Strategy
+from player.strategy.jeff.bad_strategy import BadStrategy
+from player.strategy.sandbox import StrategyPool
+from tournament import Tournament
+
+
+def test_sandboxed_players_are_counted_under_their_own_strategy():
+  metrics = GameMetrics()
+  with StrategyPool() as pool:
+    players = [Player("Alice", pool.strategy(Strategy)), Player("Jeff", pool.strategy(BadStrategy))]
+    for game_index in range(0, 10):
+      game = LiarDiceGame(players, rng=Tournament.game_rng(1, game_index), reuse_players=True)
+      metrics.record_game(game, game.play_game())
+  assert sorted(metrics.strategies) == ["BadStrategy", "Strategy"]
+  assert sum(wins for _, wins in metrics.strategies.values()) == 10
@@ -0,0 +1,49 @@
+from player.player import Player
+from player.strategy.strategy import Strategy
+from player.strategy.jeff.bad_strategy import BadStrategy
+from ratings import Ratings
+from tournament import Tournament
+
+
+def play(ratings, games):
+  for _ in range(0, games):
+    ratings.update_names(["Jeff", "Alice", "Bob"])
+
+
+def test_runs_sharing_a_file_keep_each_others_games(tmp_path):
+  path = str(tmp_path / "ratings.json")
+  first, second = Ratings.load(path).fork(), Ratings.load(path).fork()
+  play(first, 30)
+  play(second, 20)
+
+  first.save_merged(path)
+  # nothing else saved in between, so it's saved as it is
+  assert Ratings.same(Ratings.load(path).ratings, first.ratings)
+  merged = second.save_merged(path)
+  saved = Ratings.load(path)
+  assert Ratings.same(saved.ratings, merged.ratings)
+  assert saved.ratings["Jeff"].games == 50
+  assert saved.ratings["Jeff"].mu > first.ratings["Jeff"].mu
+
+  # saving them again doesn't count their games twice
+  merged.save_merged(path)
+  assert Ratings.same(Ratings.load(path).ratings, saved.ratings)
+
+
+def test_resuming_a_finished_run_rates_its_games_once(tmp_path):
+  def make_tournament():
+    players = [Player("Alice", Strategy), Player("Jeff", BadStrategy)]
+    return Tournament(
+      players, num_games=20, seed=5, checkpoint=str(tmp_path / "run.ckpt"), ratings=str(tmp_path / "ratings.json")
+    )
+
+  path = str(tmp_path / "ratings.json")
+  make_tournament().run()
+  # another run saves to the same file, so this run's ratings had to be merged in
+  other = Ratings.load(path).fork()
+  play(other, 5)
+  other.save_merged(path)
+  saved = Ratings.load(path)
+  assert saved.ratings["Jeff"].games == 25
+  make_tournament().run(resume=True)
+  assert Ratings.same(Ratings.load(path).ratings, saved.ratings)
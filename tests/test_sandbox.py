@@ -0,0 +1,104 @@
+import os
+import time
+
+from game.bid import Bid
+from liars_dice import LiarDiceGame
+from player.player import Player
+from player.strategy.strategy import Strategy
+from player.strategy.jeff.bad_strategy import BadStrategy
+from player.strategy.sandbox import INVALID_BID, MAKE_BID, StrategyPool
+from tournament import Tournament
+
+
+class Raises(Strategy):
+  def make_bid(self, *args):
+    raise RuntimeError("no bid")
+
+  def challenge_bid(self, *args):
+    raise RuntimeError("no call")
+
+
+class Dies(Strategy):
+  # only the player called "Dies" takes the worker down
+  def make_bid(self, *args):
+    if self.name == "Dies":
+      os._exit(1)
+    return super().make_bid(*args)
+
+
+class Hangs(Strategy):
+  def make_bid(self, *args):
+    if self.name == "Hangs":
+      time.sleep(30)
+    return super().make_bid(*args)
+
+
+COUNTED = [
+  "placements", "bids", "num_calls", "bids_called", "successful_bids", "successful_calls", "calls_out_of_turn",
+  "forced_calls", "games_won_with_dice", "winning_dice_sum",
+]
+
+# arguments to make_bid for the first bid of a round
+FIRST_BID = ((), None, (("A", 5), ("B", 5)), 1, (1, 2, 3, 4, 5))
+
+
+def play(players, concurrent_games=1):
+  placings = []
+  tournament = Tournament(players, 40, seed=3, concurrent_games=concurrent_games)
+  results = tournament.play_games(0, 40, 3, placings=placings)
+  return placings, {name: [getattr(stats, field) for field in COUNTED] for name, stats in results.items()}
+
+
+def test_sandboxed_games_play_out_the_same_as_in_process():
+  in_process = play([Player("Alice", Strategy), Player("Bob", Strategy), Player("Jeff", BadStrategy)])
+  with StrategyPool() as pool:
+    def players():
+      return [
+        Player("Alice", pool.strategy(Strategy)), Player("Bob", pool.strategy(Strategy)),
+        Player("Jeff", pool.strategy(BadStrategy)),
+      ]
+    assert play(players()) == in_process
+    assert play(players(), concurrent_games=8) == in_process
+    assert all(worker.failures == 0 and worker.restarts == 0 for worker in pool.workers.values())
+
+
+def test_a_strategy_that_raises_bids_invalidly_and_passes():
+  with StrategyPool() as pool:
+    strategy = pool.strategy(Raises)("A")
+    assert strategy.make_bid(*FIRST_BID) == INVALID_BID
+    assert strategy.challenge_bid((), Bid(1, 2), (("A", 5), ("B", 5)), 0.5, 1, (1, 2, 3, 4, 5), False) is False
+    # raising doesn't cost the worker its process
+    worker = pool.workers[Raises]
+    assert worker.failures == 2 and worker.restarts == 0
+
+    # and a game with it in still plays out, with it bidding its way out first
+    players = [Player("Alice", Strategy), Player("Raises", pool.strategy(Raises))]
+    standings = LiarDiceGame(players, rng=Tournament.game_rng(1, 0)).play_game()
+    assert standings[-1].name == "Raises"
+
+
+def test_a_worker_that_dies_mid_batch_fails_the_batch_and_restarts():
+  with StrategyPool() as pool:
+    make = pool.strategy(Dies)
+    worker = pool.workers[Dies]
+    alive, dies = make("Alive"), make("Dies")
+    # both calls go in one batch, and neither comes back
+    results = worker.send([], [(alive.instance_id, "Alive", MAKE_BID, FIRST_BID), (dies.instance_id, "Dies", MAKE_BID, FIRST_BID)])
+    assert [ok for ok, _ in results] == [False, False]
+    assert worker.restarts == 1
+
+    # through the strategy, a crash counts as an invalid bid, and the restarted worker carries on
+    assert dies.make_bid(*FIRST_BID) == INVALID_BID
+    assert worker.restarts == 2
+    assert alive.make_bid(*FIRST_BID) != INVALID_BID
+
+
+def test_a_worker_that_times_out_is_restarted():
+  with StrategyPool(timeout=0.5) as pool:
+    make = pool.strategy(Hangs)
+    worker = pool.workers[Hangs]
+    started = time.monotonic()
+    assert make("Hangs").make_bid(*FIRST_BID) == INVALID_BID
+    assert time.monotonic() - started < 10
+    assert worker.restarts == 1 and worker.failures == 1
+    assert make("Alive").make_bid(*FIRST_BID) != INVALID_BID
@@ -1,32 +1,308 @@
 import copy
+import random
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import Pool
 from typing import List
 
+from checkpoint import Checkpoint
+from metrics import Metrics
+from ratings import Ratings
 from player.strategy.jeff import bad_strategy
 from utils.color_printer import *
+from game.event_log import EventRecorder
 from liars_dice import LiarDiceGame
 from player.player import Player
+from player.player_stats import PlayerStats
 from player.strategy import strategy
 
 class Tournament:
-  def __init__(self, players: List[Player], num_games=10000):
+  # Number of chunks handed to each worker process. More chunks balance the load
+  # better, fewer chunks mean less copying and pickling of results.
+  CHUNKS_PER_PROCESS = 4
+
+  def __init__(
+    self,
+    players: List[Player],
+    num_games=10000,
+    seed=None,
+    num_processes=1,
+    event_log=None,
+    timer=None,
+    concurrent_games=1,
+    checkpoint=None,
+    checkpoint_interval=60.0,
+    metrics=None,
+    metrics_port=None,
+    metrics_interval=5.0,
+    ratings=None
+  ):
+    if concurrent_games > 1 and (event_log is not None or timer is not None):
+      raise ValueError("Event logs and decision timers can only follow one game at a time")
     self.num_games = num_games
+    self.seed = seed
+    self.num_processes = num_processes
+    self.event_log = event_log
+    self.timer = timer
+    # Games played at once in each process. Only useful when strategies spend their time
+    # waiting, like sandboxed strategies, whose calls are batched across games.
+    self.concurrent_games = concurrent_games
+    # If given, progress is saved to this file (at most every `checkpoint_interval` seconds),
+    # and `run(resume=True)` carries on from it
+    self.checkpoint = Checkpoint(checkpoint, checkpoint_interval) if checkpoint is not None else None
+    # If given, live metrics are written to this file (and/or served on this localhost port) while it runs
+    self.metrics = None
+    if metrics is not None or metrics_port is not None:
+      self.metrics = Metrics(metrics, metrics_port, metrics_interval)
+    # If given, players' ratings are loaded from this file, updated after every game, and saved back to it
+    self.ratings_path = ratings
+    self.ratings = None
     self.player_map = {}
     self.players = players
     for player in players:
       self.player_map[player.name] = player
 
-  def run(self):
-    for i in range(0, self.num_games):
-      game = LiarDiceGame(copy.deepcopy(self.players))
-      standings = game.play_game()
+  @staticmethod
+  def game_seed(seed, game_index):
+    """
+    The seed for a single game, so any game can be replayed from (seed, game_index)
+    no matter which process ended up playing it.
+    """
+    return f"{seed}:{game_index}"
+
+  @staticmethod
+  def game_rng(seed, game_index):
+    if seed is None:
+      return random.Random()
+    return random.Random(Tournament.game_seed(seed, game_index))
+
+  def replay_game(self, game_index):
+    """
+    Plays game `game_index` of a seeded tournament again, printing everything that happens.
+    """
+    if self.seed is None:
+      raise ValueError("Only games from a seeded tournament can be replayed")
+    players = copy.deepcopy(self.players)
+    for player in players:
+      player.stats = PlayerStats()
+    game = LiarDiceGame(players, verbose=True, rng=Tournament.game_rng(self.seed, game_index))
+    return game.play_game()
+
+  def play_games(self, start, stop, seed=None, log_path=None, resume_state=None, checkpoint=False, ratings=None, placings=None):
+    """
+    Plays games [start, stop) and returns the stats collected over them, keyed by player name.
+    If `log_path` is given, every event of those games is recorded there.
+    If `ratings` are given, they're updated with the result of every game.
+    If `placings` is a list, the names in each game's standings (the winner first) are added to it, in game order.
+    With `checkpoint`, progress is saved to the tournament's checkpoint as games finish.
+    Pass the state of a checkpoint as `resume_state` to carry on from it.
+    """
+    players = copy.deepcopy(self.players)
+    for player in players:
+      player.stats = PlayerStats(player.stats.keep_samples)
+    if resume_state is not None:
+      results = resume_state["results"]
+      recorder = EventRecorder(log_path, resume_state["log_offset"]) if log_path is not None else None
+    else:
+      results = {p.name: PlayerStats(p.stats.keep_samples) for p in players}
+      recorder = EventRecorder(log_path) if log_path is not None else None
+    metrics = self.metrics.batch() if self.metrics is not None else None
+
+    def play_game(game_index):
+      # games played one at a time all reuse the same players, concurrent games need their own
+      game_players = players if self.concurrent_games == 1 else copy.deepcopy(players)
+      game = LiarDiceGame(
+        game_players, rng=Tournament.game_rng(seed, game_index), recorder=recorder, timer=self.timer, reuse_players=True
+      )
+      return game, game.play_game()
+
+    if self.concurrent_games > 1:
+      all_games = self.play_concurrently(play_game, start, stop)
+    else:
+      all_games = (play_game(i) for i in range(start, stop))
+
+    # each game starts with empty stats, so they add up in game order
+    for game_index, (game, standings) in enumerate(all_games, start):
       for s in standings:
-        self.player_map.get(s.name).stats = s.stats
-    
+        results[s.name].update(s.stats)
+      if metrics is not None:
+        metrics.record_game(game, standings)
+      if ratings is not None:
+        ratings.update(standings)
+      if placings is not None:
+        placings.append(tuple(s.name for s in standings))
+      if checkpoint and self.checkpoint.due():
+        log_offset = recorder.sync() if recorder is not None else None
+        self.save_checkpoint(seed, game_index + 1, results, log_offset)
+
+    if checkpoint:
+      # the last checkpoint says where the log ends too, so resuming a finished run leaves the log as it is
+      log_offset = recorder.sync() if recorder is not None else None
+      self.save_checkpoint(seed, stop, results, log_offset)
+    if recorder is not None:
+      recorder.close()
+    if metrics is not None:
+      metrics.flush()
+    return results
+
+  def play_concurrently(self, play_game, start, stop):
+    """
+    Plays games on `concurrent_games` threads, yielding each game and its standings in game order.
+    """
+    window = self.concurrent_games * 16
+    with ThreadPoolExecutor(self.concurrent_games) as executor:
+      for window_start in range(start, stop, window):
+        yield from executor.map(play_game, range(window_start, min(window_start + window, stop)))
+
+  def chunk_ranges(self):
+    num_chunks = min(self.num_games, self.num_processes * Tournament.CHUNKS_PER_PROCESS)
+    ranges = []
+    for c in range(0, num_chunks):
+      start = c * self.num_games // num_chunks
+      stop = (c + 1) * self.num_games // num_chunks
+      ranges.append((start, stop))
+    return ranges
+
+  @property
+  def is_parallel(self):
+    return self.num_processes > 1 and self.num_games > 1
+
+  def event_log_paths(self):
+    """
+    The files the event log is written to. Each chunk of a parallel run gets its own file, in game order.
+    """
+    if self.event_log is None:
+      return []
+    if not self.is_parallel:
+      return [self.event_log]
+    return [f"{self.event_log}.{c}" for c in range(0, len(self.chunk_ranges()))]
+
+  def save_checkpoint(self, seed, games_played, results, log_offset=None):
+    self.checkpoint.save({
+      "players": [p.name for p in self.players],
+      "num_games": self.num_games,
+      "seed": seed,
+      "chunks": self.chunk_ranges() if self.is_parallel else None,
+      "games_played": games_played,
+      "results": results,
+      "log_offset": log_offset,
+      "ratings": self.ratings,
+    })
+
+  def load_checkpoint(self):
+    """
+    The state saved in the checkpoint, after checking it's from this same tournament. None if there isn't one.
+    """
+    state = self.checkpoint.load()
+    if state is None:
+      return None
+    same = (
+      state["players"] == [p.name for p in self.players]
+      and state["num_games"] == self.num_games
+      and (self.seed is None or state["seed"] == self.seed)
+      and state["chunks"] == (self.chunk_ranges() if self.is_parallel else None)
+    )
+    if not same:
+      raise ValueError(f"{self.checkpoint.path} is a checkpoint of a different tournament")
+    return state
+
+  def run_serial(self, seed, state):
+    if self.checkpoint is None:
+      return self.play_games(0, self.num_games, seed, self.event_log, ratings=self.ratings)
+    start = state["games_played"] if state is not None else 0
+    return self.play_games(start, self.num_games, seed, self.event_log, state, checkpoint=True, ratings=self.ratings)
+
+  def run_parallel(self, seed, state):
+    log_paths = self.event_log_paths() or [None] * len(self.chunk_ranges())
+    args = [(start, stop, seed, log_path) for (start, stop), log_path in zip(self.chunk_ranges(), log_paths)]
+    if state is not None:
+      results = state["results"]
+      args = [a for a in args if a[0] >= state["games_played"]]
+    else:
+      results = {p.name: PlayerStats(p.stats.keep_samples) for p in self.players}
+
+    # Chunks come back in game order, so merging gives the same stats as a serial run
+    with Pool(self.num_processes) as pool:
+      for (_, stop, _, _), (chunk_results, chunk_placings) in zip(args, pool.imap(self.play_games_chunk, args)):
+        for name, stats in chunk_results.items():
+          results[name].update(stats)
+        # rated here, game by game, so the ratings come out the same as a serial run's
+        if chunk_placings is not None:
+          for names in chunk_placings:
+            self.ratings.update_names(names)
+        if self.checkpoint is not None and (self.checkpoint.due() or stop == self.num_games):
+          self.save_checkpoint(seed, stop, results)
+    return results
+
+  def play_games_chunk(self, args):
+    """
+    Plays a chunk of a parallel run. Returns its stats, and if the tournament has ratings,
+    the standings of each of its games (as names) to rate them with.
+    """
+    placings = [] if self.ratings is not None else None
+    return self.play_games(*args, placings=placings), placings
+
+  def run(self, resume=False):
+    """
+    Plays the tournament and prints the results. With `resume`, carries on from the
+    tournament's checkpoint (if there is one), and ends up with the same results as
+    if it had never stopped.
+    """
+    state = None
+    if resume:
+      if self.checkpoint is None:
+        raise ValueError("Only tournaments with a checkpoint can be resumed")
+      state = self.load_checkpoint()
+
+    seed = self.seed
+    if state is not None:
+      seed = state["seed"]
+    elif seed is None and (self.is_parallel or self.checkpoint is not None):
+      # Workers need their own seeds, otherwise forked processes all share the same random state.
+      # A run that can be resumed needs one too, so the games after a checkpoint are the ones it would have played.
+      seed = random.randrange(1 << 32)
+
+    if self.ratings_path is not None:
+      if state is not None and state.get("ratings") is not None:
+        self.ratings = state["ratings"]
+      else:
+        self.ratings = Ratings.load(self.ratings_path).fork()
+
+    if self.metrics is not None:
+      self.metrics.start(processes=self.is_parallel)
+    try:
+      if state is not None and state["games_played"] == self.num_games:
+        # already finished, so there's nothing to play (or write to the event log)
+        results = state["results"]
+      elif self.is_parallel:
+        results = self.run_parallel(seed, state)
+      else:
+        results = self.run_serial(seed, state)
+    finally:
+      if self.metrics is not None:
+        self.metrics.close()
+
+    for name, stats in results.items():
+      self.player_map.get(name).stats.update(stats)
+
     ColorPrinter.cprint(Color.CYAN, "\n******************** RESULTS ********************")
     for player in list(self.player_map.values()):
       ColorPrinter.cprint(Color.BLUE, player.name)
       print(player.stats)
 
+    if self.ratings is not None:
+      if state is not None and state.get("ratings_saved"):
+        self.ratings = Ratings.load(self.ratings_path)
+      else:
+        # other runs may have saved their ratings to the same file since this one loaded it
+        self.ratings = self.ratings.save_merged(self.ratings_path)
+        if self.checkpoint is not None:
+          # so resuming the finished run doesn't rate its games again
+          saved_state = self.checkpoint.load()
+          saved_state["ratings_saved"] = True
+          self.checkpoint.save(saved_state)
+      ColorPrinter.cprint(Color.CYAN, "\n******************** RATINGS ********************")
+      print(self.ratings)
+
 
 if __name__ == "__main__":
   # Create players